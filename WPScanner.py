@@ -1,9 +1,18 @@
 # WPScanner.py
 import os
+import time
+import asyncio
+import threading
 import subprocess
 import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Any
 from rich.logging import RichHandler
+import scanSupervisor
+import wpFingerprint
+import scanCheckpoint
+import runWorkspace
 
 # Configure rich logging
 logging.basicConfig(level=logging.INFO,
@@ -75,7 +84,13 @@ def checkIfFileExists(outputfile) -> Any | str:
     return outputfile
 
 
-command = [r'C:\Ruby27-x64\bin\wpscan.bat', '--disable-tls-checks', '--update', '--cache-dir', './cache/']
+WPSCAN_CACHE_DIR = './cache/'
+UPDATE_STAMP_FILE = os.path.join(WPSCAN_CACHE_DIR, 'last_update')
+UPDATE_LOCK_FILE = os.path.join(WPSCAN_CACHE_DIR, 'update.lock')
+UPDATE_TTL_HOURS = float(os.environ.get('WPSCAN_UPDATE_TTL_HOURS', '12'))  # Skip the DB update if it ran within this many hours
+UPDATE_LOCK_STALE_SECONDS = 30 * 60  # A lock older than this belongs to a dead updater
+command = [r'C:\Ruby27-x64\bin\wpscan.bat', '--disable-tls-checks', '--update', '--cache-dir', WPSCAN_CACHE_DIR]
+_update_lock = threading.Lock()
 
 
 def update_wpscan() -> bool:
@@ -91,6 +106,65 @@ def update_wpscan() -> bool:
         return False
 
 
+def last_wpscan_update() -> float | None:
+    """Return the time of the last successful WPScan DB update, or None if it never ran."""
+    try:
+        with open(UPDATE_STAMP_FILE, 'r', encoding='utf-8') as file:
+            return float(file.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def wpscan_db_is_fresh(ttl_hours=UPDATE_TTL_HOURS) -> bool:
+    last_update = last_wpscan_update()
+    return last_update is not None and time.time() - last_update < ttl_hours * 3600
+
+
+@contextmanager
+def update_file_lock():
+    """Hold the cross-process update lock so concurrent scanner processes wait for one in-flight update."""
+    os.makedirs(WPSCAN_CACHE_DIR, exist_ok=True)
+    while True:
+        try:
+            fd = os.open(UPDATE_LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(UPDATE_LOCK_FILE) > UPDATE_LOCK_STALE_SECONDS:
+                    logger.warning(f"Removing stale WPScan update lock {UPDATE_LOCK_FILE}")
+                    os.remove(UPDATE_LOCK_FILE)
+                    continue
+            except OSError:
+                continue
+            logger.info("Waiting for a WPScan update already in progress...")
+            time.sleep(2)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(UPDATE_LOCK_FILE)
+        except OSError:
+            pass
+
+
+def ensure_wpscan_updated(ttl_hours=UPDATE_TTL_HOURS) -> bool:
+    """Update the WPScan DB unless it was refreshed within ttl_hours. Concurrent callers share one update."""
+    if wpscan_db_is_fresh(ttl_hours):
+        logger.info(f"WPScan DB updated less than {ttl_hours:g}h ago, skipping update.")
+        return True
+    with _update_lock, update_file_lock():
+        if wpscan_db_is_fresh(ttl_hours):
+            logger.info("WPScan DB was updated by another scan, skipping update.")
+            return True
+        if not update_wpscan():
+            return False
+        with open(UPDATE_STAMP_FILE, 'w', encoding='utf-8') as file:
+            file.write(str(time.time()))
+        return True
+
+
 # # Function to run WPWatcher for a given domain list
 # def run_wpwatcher(domain_list_name: str) -> None:
 #     logger.info(f"Received domain list {domain_list_name}")
@@ -123,45 +197,139 @@ def update_wpscan() -> bool:
 #         logger.info(f"{group_name}: WPWatcher executed successfully for all domains.")
 #     except Exception as e:
 #         logger.error(f"Failed to execute WPWatcher for {domain_list_name}: {e}")
+WPWATCHER_CONCURRENCY = 3  # wpwatcher children allowed to run at the same time
+WPWATCHER_OUTPUT_DIR = "output/wpwatcher-output"
+LOGDIR = "logs"
+
+
+def checkpoint_for(domain_list_name: str, resume: bool) -> scanCheckpoint.Checkpoint:
+    workspace = runWorkspace.Workspace.current()
+    directory = workspace.root if workspace else scanCheckpoint.CHECKPOINT_DIR
+    return scanCheckpoint.Checkpoint("wpscan", domain_list_name, resume=resume, directory=directory)
+
+
+def record_artifact(domain: str, path: str) -> None:
+    """Add a scan log to the run's manifest when running inside a workspace."""
+    workspace = runWorkspace.Workspace.current()
+    if workspace:
+        workspace.record('wpscan-log', domain, path)
+
+
+def fingerprint_gate(domain: str) -> wpFingerprint.Gate:
+    """Fingerprint a domain; when the full scan can be skipped its cached findings are copied into the log directory."""
+    gate = wpFingerprint.check_target(domain, wpFingerprint.vuln_db_version())
+    if not gate.skip:
+        return gate
+    workspace = runWorkspace.Workspace.current()
+    reused = wpFingerprint.reuse_findings(domain, workspace.path('wpscan', 'cached', '') if workspace else LOGDIR)
+    if reused is None:
+        return gate._replace(skip=False)
+    record_artifact(domain, reused)
+    return gate
+
+
+# Prepare the WPWatcher job for a single domain of a domain list
+def prepare_wpwatcher_job(domain: str, config_file: str, domain_list_name: str) -> tuple[str, list[str], str] | None:
+    output_folder = f"output/{domain_list_name}/"
+    group_name = domain_list_name.capitalize()
+    domain_name = domain.split('//')[-1].split('.')[0]
+    domain_output_dir = os.path.join(output_folder, domain_name)
+    # try:
+    #     os.makedirs(domain_output_dir, exist_ok=True)
+    #     logger.info(f"{group_name}: Output directory for {domain_name} created successfully.")
+    # except OSError as e:
+    #     logger.error(f"{group_name}: Failed to create output directory for {domain_name}: {e}")
+    #     return None
+    label = f"{group_name}/{domain_name}"
+    cmd = ["wpwatcher", "--conf", f"_configs/{config_file}"]
+    workspace = runWorkspace.Workspace.current()
+    if workspace:
+        # wpwatcher's command-line options override its config file, so its report database, log and
+        # wpscan output go into the run as well instead of the shared directories the configs name
+        run_dir = workspace.path('wpwatcher', domain_list_name, domain_name, '')
+        cmd += ["--wp_reports", os.path.join(run_dir, "wp_reports.json"), "--log_file", os.path.join(run_dir, "wpwatcher.log"),
+                "--wpscan_output_folder", os.path.join(run_dir, "wpscan")]
+        transcript_path = workspace.path('wpscan', domain_list_name, f"{domain_name}.log")
+    else:
+        if not os.access(domain_output_dir, os.W_OK):
+            logger.error(f"{group_name}: Insufficient permissions to write to output directory: {domain_output_dir}")
+            return None
+        transcript_path = os.path.join(WPWATCHER_OUTPUT_DIR, f"{domain_name}.log")
+    return label, cmd, transcript_path
+
+
+# Function to run WPWatcher for a single domain of a domain list
+def run_wpwatcher_for_domain(domain: str, config_file: str, domain_list_name: str, on_line=None) -> bool:
+    gate = fingerprint_gate(domain)
+    if gate.skip:
+        logger.info(f"{domain_list_name}: {domain} unchanged, full scan skipped.")
+        return True
+    job = prepare_wpwatcher_job(domain, config_file, domain_list_name)
+    if job is None:
+        return False
+    label, cmd, transcript_path = job
+    try:
+        returncode, _ = scanSupervisor.run_streaming(cmd, label, on_line=on_line, transcript_path=transcript_path)
+    except OSError as e:
+        logger.error(f"{label}: Failed to execute WPWatcher: {e}")
+        return False
+    if returncode != 0:
+        logger.error(f"{label}: WPWatcher exited with code {returncode}.")
+        return False
+    logger.info(f"{label}: WPWatcher executed successfully.")
+    wpFingerprint.record_scan(domain, gate, transcript_path)
+    record_artifact(domain, transcript_path)
+    return True
+
+
 # Function to run WPWatcher for a given domain list
-def run_wpwatcher(domain_list_name: str) -> None:
+def run_wpwatcher(domain_list_name: str, resume: bool = False) -> None:
     logger.info(f"Received domain list {domain_list_name}")
     try:
-        update_wpscan()
-    except subprocess.CalledProcessError as e:
+        ensure_wpscan_updated()
+    except OSError as e:
         logger.error(f"Failed to update WPWatcher: {e}")
     try:
-        domain_config_pairs = domain_configurations.get(domain_list_name, [])
-        output_folder = f"output/{domain_list_name}/"
-        group_name = domain_list_name.capitalize()
-        for domain, config_file in domain_config_pairs:
-            domain_name = domain.split('//')[-1].split('.')[0]
-            domain_output_dir = os.path.join(output_folder, domain_name)
-            # try:
-            #     os.makedirs(domain_output_dir, exist_ok=True)
-            #     logger.info(f"{group_name}: Output directory for {domain_name} created successfully.")
-            # except OSError as e:
-            #     logger.error(f"{group_name}: Failed to create output directory for {domain_name}: {e}")
-            #     continue
-            if not os.access(domain_output_dir, os.W_OK):
-                logger.error(f"{group_name}: Insufficient permissions to write to output directory: {domain_output_dir}")
-                continue
-            try:
-                subprocess.run(["wpwatcher", "--conf", f"_configs/{config_file}"], check=True)
-                logger.info(f"{group_name}: WPWatcher executed successfully for {domain_name}.")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"{group_name}: Failed to execute WPWatcher for {domain_name}: {e}")
+        checkpoint = checkpoint_for(domain_list_name, resume)
+        domain_config_pairs = [(domain, config_file) for domain, config_file in domain_configurations.get(domain_list_name, []) if not checkpoint.is_done(domain)]
+        with ThreadPoolExecutor(max_workers=WPWATCHER_CONCURRENCY) as executor:
+            gates = list(executor.map(fingerprint_gate, [domain for domain, _ in domain_config_pairs]))
+        jobs = []
+        scanned = {}
+        for (domain, config_file), gate in zip(domain_config_pairs, gates):
+            if gate.skip:
+                logger.info(f"{domain_list_name}: {domain} unchanged, full scan skipped.")
+                checkpoint.complete(domain, [wpFingerprint.findings_path(domain)])
                 continue
+            job = prepare_wpwatcher_job(domain, config_file, domain_list_name)
+            if job:
+                jobs.append(job)
+                scanned[job[0]] = (domain, gate, job[2])
+                checkpoint.start(domain, [job[2]])
+
+        def on_done(label, returncode, _) -> None:
+            if returncode == 0:
+                domain, gate, transcript_path = scanned[label]
+                wpFingerprint.record_scan(domain, gate, transcript_path)
+                record_artifact(domain, transcript_path)
+                checkpoint.complete(domain, [transcript_path])
+
+        timings = asyncio.run(scanSupervisor.supervise(jobs, WPWATCHER_CONCURRENCY, on_done=on_done))
+        failed = [label for label, (returncode, _) in timings.items() if returncode != 0]
+        for label in failed:
+            logger.error(f"{label}: Failed to execute WPWatcher.")
+        logger.info(f"{domain_list_name}: WPWatcher finished {len(timings) - len(failed)}/{len(timings)} domains successfully.")
+        if not checkpoint.remaining(domain for domain, _ in domain_configurations.get(domain_list_name, [])):
+            checkpoint.finish()
     except Exception as e:
         logger.error(f"Failed to execute WPWatcher for {domain_list_name}: {e}")
-        logger.info(f"{group_name}: WPWatcher executed successfully for all domains.")
 
 
-def main(domain_list_name) -> None:
+def main(domain_list_name, resume=False) -> None:
     if not domain_list_name:
         logger.error("No domain list name provided.")
         return
-    run_wpwatcher(domain_list_name)
+    run_wpwatcher(domain_list_name, resume=resume)
     # copyAll = copyFilesFromSrcToDestDir(LOGDIR, EXCELDIR)
     # if copyAll:
     #     logger.info(f"Files copied successfully from {LOGDIR} to {EXCELDIR}")
@@ -174,6 +342,6 @@ def main(domain_list_name) -> None:
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
-        main(sys.argv[1])
+        main(sys.argv[1], resume="--resume" in sys.argv[2:])
     else:
         logger.error("No domain list name provided.")
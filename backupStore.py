@@ -0,0 +1,281 @@
+# backupStore.py
+import os
+import re
+import json
+import zlib
+import shutil
+import hashlib
+import logging
+import argparse
+import datetime
+from typing import Iterator
+from rich.logging import RichHandler
+
+try:
+    import zstandard
+except ImportError:  # zlib is used when zstandard is not installed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = 'output/backups'
+OBJECTS_DIR = 'objects'
+INDEX_DIR = 'indexes'
+TEXT_EXTENSIONS = ('.txt', '.log', '.csv', '.json')  # Chunked on line boundaries so an edit only changes the chunks around it
+LINE_CHUNK_MASK = 0x1f  # A line ends a chunk when its hash has these bits clear (about one line in 32)
+MIN_CHUNK = 2 * 1024
+MAX_CHUNK = 64 * 1024
+BINARY_CHUNK = 1024 * 1024  # Screenshots and workbooks rarely change in part, so fixed chunks only dedupe identical files
+ZSTD_LEVEL = 10
+BACKUP_FOLDER = re.compile(r'^backup_(\d{2}-\d{2}-\d{2})$')  # Excel/backup_<dd-mm-yy> as summarizeScans names them
+
+
+def text_chunks(file) -> Iterator[bytes]:
+    """Content-defined chunks of a text file: boundaries fall after lines picked by their own hash, so inserted lines don't shift the rest."""
+    chunk = bytearray()
+    for line in file:
+        chunk += line
+        if len(chunk) >= MAX_CHUNK or (len(chunk) >= MIN_CHUNK and zlib.crc32(line) & LINE_CHUNK_MASK == 0):
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+def binary_chunks(file) -> Iterator[bytes]:
+    yield from iter(lambda: file.read(BINARY_CHUNK), b'')
+
+
+def compress(data) -> bytes:
+    if zstandard is not None:
+        return b'Z' + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return b'z' + zlib.compress(data, 9)
+
+
+def decompress(blob) -> bytes:
+    codec, payload = blob[:1], blob[1:]
+    if codec == b'Z':
+        if zstandard is None:
+            raise RuntimeError("This backup chunk is zstd-compressed; install zstandard to restore it")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+class BackupStore:
+    """Deduplicated backups: each unique chunk is stored once, compressed, under its sha256, and each day is a small index of file -> chunk list."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, OBJECTS_DIR), exist_ok=True)
+        os.makedirs(os.path.join(root, INDEX_DIR), exist_ok=True)
+
+    def _object_path(self, digest) -> str:
+        return os.path.join(self.root, OBJECTS_DIR, digest[:2], digest[2:])
+
+    def _index_path(self, label) -> str:
+        return os.path.join(self.root, INDEX_DIR, f"{label}.json")
+
+    def _put(self, chunk) -> tuple[str, int]:
+        """Store a chunk unless already present. Returns its digest and the compressed bytes written (0 for a duplicate)."""
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = compress(chunk)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(blob)
+        os.replace(temp_path, path)
+        return digest, len(blob)
+
+    def labels(self) -> list[str]:
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(self.root, INDEX_DIR)) if name.endswith('.json'))
+
+    def load_index(self, label) -> dict | None:
+        try:
+            with open(self._index_path(label), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def backup(self, source_dir, label) -> dict:
+        """Back up every file under source_dir as day `label`, replacing that day's index."""
+        files = {}
+        total = written = 0
+        for root, _, names in os.walk(source_dir):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                chunker = text_chunks if name.endswith(TEXT_EXTENSIONS) else binary_chunks
+                chunks = []
+                with open(path, 'rb') as file:
+                    for chunk in chunker(file):
+                        digest, size = self._put(chunk)
+                        chunks.append(digest)
+                        written += size
+                stat = os.stat(path)
+                files[os.path.relpath(path, source_dir)] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'chunks': chunks}
+                total += stat.st_size
+        index = {'label': label, 'source': os.path.abspath(source_dir), 'created_at': datetime.datetime.now().isoformat(timespec='seconds'), 'files': files}
+        temp_path = f"{self._index_path(label)}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(index, file)
+        os.replace(temp_path, self._index_path(label))
+        logger.info(f"Backed up {len(files)} files ({total} bytes) from {source_dir} as {label}, {written} new compressed bytes stored")
+        return index
+
+    def restore(self, label, destination_dir) -> int:
+        """Rebuild day `label` under destination_dir. Returns the number of files restored."""
+        index = self.load_index(label)
+        if index is None:
+            raise FileNotFoundError(f"No backup for {label} in {self.root}")
+        for relative, entry in index['files'].items():
+            path = os.path.join(destination_dir, relative)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as file:
+                for digest in entry['chunks']:
+                    with open(self._object_path(digest), 'rb') as blob:
+                        chunk = decompress(blob.read())
+                    if hashlib.sha256(chunk).hexdigest() != digest:
+                        raise ValueError(f"Backup chunk {digest} of {relative} is corrupt")
+                    file.write(chunk)
+            os.utime(path, (entry['mtime'], entry['mtime']))
+        logger.info(f"Restored {len(index['files'])} files of {label} into {destination_dir}")
+        return len(index['files'])
+
+    def matches(self, label, source_dir) -> bool:
+        """Whether day `label` holds exactly the files (by path, size and modification time) currently in source_dir."""
+        index = self.load_index(label)
+        if index is None:
+            return False
+        current = {}
+        for root, _, names in os.walk(source_dir):
+            for name in names:
+                stat = os.stat(os.path.join(root, name))
+                current[os.path.relpath(os.path.join(root, name), source_dir)] = (stat.st_size, stat.st_mtime)
+        return current == {relative: (entry['size'], entry['mtime']) for relative, entry in index['files'].items()}
+
+    def holds(self, label, source_dir) -> bool:
+        """Whether day `label` holds exactly source_dir's current contents, checked chunk by chunk rather than by size and time."""
+        index = self.load_index(label)
+        if index is None:
+            return False
+        current = {}
+        for root, _, names in os.walk(source_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                chunker = text_chunks if name.endswith(TEXT_EXTENSIONS) else binary_chunks
+                with open(path, 'rb') as file:
+                    current[os.path.relpath(path, source_dir)] = [hashlib.sha256(chunk).hexdigest() for chunk in chunker(file)]
+        return current == {relative: entry['chunks'] for relative, entry in index['files'].items()}
+
+    def prune(self, keep) -> tuple[int, int]:
+        """Drop all but the newest `keep` days, then delete chunks no remaining day uses. Returns (days, chunks) removed."""
+        labels = sorted(self.labels(), key=label_date)
+        dropped = labels[:max(0, len(labels) - keep)]
+        for label in dropped:
+            os.remove(self._index_path(label))
+        referenced = set()
+        for label in self.labels():
+            for entry in self.load_index(label)['files'].values():
+                referenced.update(entry['chunks'])
+        removed = 0
+        objects_dir = os.path.join(self.root, OBJECTS_DIR)
+        for prefix in os.listdir(objects_dir):
+            for name in os.listdir(os.path.join(objects_dir, prefix)):
+                if prefix + name not in referenced:
+                    os.remove(os.path.join(objects_dir, prefix, name))
+                    removed += 1
+        logger.info(f"Pruned {len(dropped)} days and {removed} unreferenced chunks")
+        return len(dropped), removed
+
+
+def label_date(label) -> datetime.date:
+    """Sort key for day labels: summarizeScans' dd-mm-yy dates in date order, anything else as text after them."""
+    try:
+        return datetime.datetime.strptime(label, '%d-%m-%y').date()
+    except ValueError:
+        return datetime.date.max
+
+
+def archive_day_folders(excel_dir, keep_label, store=None, remove=False) -> list[str]:
+    """Back up each Excel/backup_<date> folder not yet in the store; with remove, delete past days' folders the store holds.
+
+    keep_label's folder (today's) is backed up again whenever it changed, and never removed, since the
+    mailer zips today's screenshots from it. A past day's index is only ever added, never replaced, so
+    a folder restored or edited later cannot overwrite what was archived. Folders are only removed after
+    their content is verified against the index. Returns the labels whose folders were removed.
+    """
+    store = store or BackupStore()
+    removed = []
+    for name in sorted(os.listdir(excel_dir)):
+        match = BACKUP_FOLDER.match(name)
+        folder = os.path.join(excel_dir, name)
+        if not match or not os.path.isdir(folder):
+            continue
+        label = match.group(1)
+        if label == keep_label:
+            if not store.matches(label, folder):
+                store.backup(folder, label)
+            continue
+        if store.load_index(label) is None:
+            store.backup(folder, label)
+        if remove and store.holds(label, folder):
+            shutil.rmtree(folder)
+            removed.append(label)
+    if removed:
+        logger.info(f"Removed backup folders now held in {store.root}: {', '.join(removed)}")
+    return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deduplicated, compressed store of the daily Excel/backup_<date> folders.")
+    parser.add_argument('--store', default=STORE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    backup_parser = sub.add_parser('backup', help="Back up a folder as one day")
+    backup_parser.add_argument('directory')
+    backup_parser.add_argument('--label', help="Day label, defaults to the date in a backup_<dd-mm-yy> folder name")
+    restore_parser = sub.add_parser('restore', help="Rebuild a day's folder")
+    restore_parser.add_argument('label')
+    restore_parser.add_argument('--dest', help="Destination folder, defaults to Excel/backup_<label>")
+    sub.add_parser('list', help="List the days in the store")
+    prune_parser = sub.add_parser('prune', help="Keep only the newest days and drop unused chunks")
+    prune_parser.add_argument('--keep', type=int, required=True)
+    args = parser.parse_args()
+    store = BackupStore(args.store)
+    if args.command == 'backup':
+        match = BACKUP_FOLDER.match(os.path.basename(os.path.normpath(args.directory)))
+        label = args.label or (match.group(1) if match else None)
+        if label is None:
+            parser.error("--label is required for folders not named backup_<dd-mm-yy>")
+        store.backup(args.directory, label)
+    elif args.command == 'restore':
+        store.restore(args.label, args.dest or os.path.join('Excel', f"backup_{args.label}"))
+    elif args.command == 'list':
+        for label in sorted(store.labels(), key=label_date):
+            index = store.load_index(label)
+            print(f"{label}\t{len(index['files'])} files\t{sum(entry['size'] for entry in index['files'].values())} bytes")
+    elif args.command == 'prune':
+        store.prune(args.keep)
+
+
+if __name__ == "__main__":
+    # Configured here rather than at import so summarizeScans keeps its own log format
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M%p',
+                        handlers=[
+                            RichHandler(show_time=True,
+                                        omit_repeated_times=False,
+                                        show_level=True,
+                                        show_path=True,
+                                        enable_link_path=True,
+                                        markup=True,
+                                        rich_tracebacks=True,
+                                        tracebacks_width=200,
+                                        tracebacks_show_locals=False,
+                                        tracebacks_theme='monokai',
+                                        tracebacks_extra_lines=0,
+                                        log_time_format='[%X]')
+                        ])
+    main()
@@ -0,0 +1,251 @@
+# dnsCache.py
+import os
+import time
+import socket
+import struct
+import sqlite3
+import logging
+import argparse
+import threading
+import socketserver
+from rich.logging import RichHandler
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB = 'cache/dns_cache.sqlite'
+LISTEN_ADDRESS = '127.0.0.1'  # dnstwist --nameservers takes bare IPs, so the stub has to answer on port 53
+LISTEN_PORT = 53
+UPSTREAM_SERVERS = ['8.8.8.8', '1.1.1.1']
+UPSTREAM_TIMEOUT = 2.0
+MAX_TTL = 24 * 3600  # Upper bound for any cached answer
+DEFAULT_NEGATIVE_TTL = 15 * 60  # NXDOMAIN/NODATA lifetime when the upstream sends no SOA
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+TYPE_SOA = 6
+TYPE_OPT = 41
+
+
+def _skip_name(message, offset) -> int:
+    """Return the offset just past a (possibly compressed) domain name."""
+    while True:
+        length = message[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+
+def parse_question(message) -> tuple[str, int, int] | None:
+    """Return (qname, qtype, qclass) of a query, or None if it is not a single-question query."""
+    if len(message) < 12 or struct.unpack('!H', message[4:6])[0] != 1:
+        return None
+    labels = []
+    offset = 12
+    while message[offset] != 0:
+        length = message[offset]
+        labels.append(message[offset + 1:offset + 1 + length].decode('ascii', errors='replace').lower())
+        offset += length + 1
+    qtype, qclass = struct.unpack('!HH', message[offset + 1:offset + 5])
+    return '.'.join(labels), qtype, qclass
+
+
+def parse_records(message) -> list[tuple[int, int, int, int, bytes]]:
+    """Return (section, type, ttl, ttl_offset, rdata) for every resource record after the question."""
+    qdcount, ancount, nscount, arcount = struct.unpack('!HHHH', message[4:12])
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(message, offset) + 4
+    records = []
+    for section, count in enumerate((ancount, nscount, arcount)):
+        for _ in range(count):
+            offset = _skip_name(message, offset)
+            rtype, _, ttl, rdlength = struct.unpack('!HHIH', message[offset:offset + 10])
+            records.append((section, rtype, ttl, offset + 4, message[offset + 10:offset + 10 + rdlength]))
+            offset += 10 + rdlength
+    return records
+
+
+def cache_ttl(response) -> int | None:
+    """How long a response may be cached: min answer TTL when positive, SOA-derived when negative, None if uncacheable."""
+    flags = struct.unpack('!H', response[2:4])[0]
+    rcode = flags & 0x000F
+    if flags & 0x0200 or rcode not in (RCODE_NOERROR, RCODE_NXDOMAIN):  # Truncated or server failure
+        return None
+    records = parse_records(response)
+    answers = [ttl for section, rtype, ttl, _, _ in records if section == 0]
+    if rcode == RCODE_NOERROR and answers:
+        return min(min(answers), MAX_TTL)
+    for section, rtype, ttl, _, rdata in records:
+        if section == 1 and rtype == TYPE_SOA:
+            minimum = struct.unpack('!I', rdata[-4:])[0]
+            return min(ttl, minimum, MAX_TTL)
+    return DEFAULT_NEGATIVE_TTL
+
+
+def rewrite_response(response, query_id, remaining) -> bytes:
+    """Give a cached response the client's query ID and TTLs counted down to what is left."""
+    message = bytearray(response)
+    message[0:2] = struct.pack('!H', query_id)
+    for _, rtype, ttl, ttl_offset, _ in parse_records(response):
+        if rtype != TYPE_OPT:  # The OPT pseudo-record's "TTL" holds EDNS flags
+            message[ttl_offset:ttl_offset + 4] = struct.pack('!I', max(0, min(ttl, remaining)))
+    return bytes(message)
+
+
+class DnsCache:
+    """Positive/negative DNS answer cache held in memory and persisted to SQLite across runs."""
+
+    def __init__(self, path=CACHE_DB, upstreams=None):
+        self.upstreams = upstreams or UPSTREAM_SERVERS
+        self.entries: dict[str, tuple[bytes, float, bool]] = {}
+        self.stats = {'queries': 0, 'hits': 0, 'negative_hits': 0, 'misses': 0, 'upstream_errors': 0}
+        self._lock = threading.Lock()
+        self._next_upstream = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, response BLOB NOT NULL, expires REAL NOT NULL, negative INTEGER NOT NULL)")
+        now = time.time()
+        self.db.execute("DELETE FROM answers WHERE expires <= ?", (now,))
+        self.db.commit()
+        for key, response, expires, negative in self.db.execute("SELECT key, response, expires, negative FROM answers"):
+            self.entries[key] = (bytes(response), expires, bool(negative))
+        logger.info(f"Loaded {len(self.entries)} cached DNS answers from {path}")
+
+    def _query_upstream(self, query) -> bytes | None:
+        with self._lock:
+            start = self._next_upstream
+            self._next_upstream = (self._next_upstream + 1) % len(self.upstreams)
+        for i in range(len(self.upstreams)):
+            server = self.upstreams[(start + i) % len(self.upstreams)]
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(UPSTREAM_TIMEOUT)
+                try:
+                    sock.sendto(query, (server, 53))
+                    response, _ = sock.recvfrom(65535)
+                    if response[:2] == query[:2]:
+                        return response
+                except OSError:
+                    continue
+        return None
+
+    def resolve(self, query) -> bytes | None:
+        question = parse_question(query)
+        query_id = struct.unpack('!H', query[:2])[0]
+        now = time.time()
+        key = None
+        with self._lock:
+            self.stats['queries'] += 1
+            if question is not None:
+                key = f"{question[0]}|{question[1]}|{question[2]}"
+                cached = self.entries.get(key)
+                if cached and cached[1] > now:
+                    self.stats['hits'] += 1
+                    self.stats['negative_hits'] += cached[2]
+                    return rewrite_response(cached[0], query_id, int(cached[1] - now))
+            self.stats['misses'] += 1
+        response = self._query_upstream(query)
+        if response is None:
+            with self._lock:
+                self.stats['upstream_errors'] += 1
+            return None
+        try:
+            ttl = cache_ttl(response) if key else None
+        except (IndexError, struct.error):
+            ttl = None
+        if ttl:
+            negative = not any(section == 0 for section, *_ in parse_records(response))
+            with self._lock:
+                self.entries[key] = (response, now + ttl, negative)
+                self.db.execute("INSERT OR REPLACE INTO answers (key, response, expires, negative) VALUES (?, ?, ?, ?)", (key, response, now + ttl, int(negative)))
+                self.db.commit()
+        return response
+
+    def hit_rate(self) -> float:
+        return self.stats['hits'] / self.stats['queries'] if self.stats['queries'] else 0.0
+
+    def log_stats(self) -> None:
+        logger.info(f"DNS cache: {self.stats['queries']} queries, {self.hit_rate():.1%} hit rate "
+                    f"({self.stats['negative_hits']} negative hits), {self.stats['misses']} upstream lookups, "
+                    f"{self.stats['upstream_errors']} upstream errors, {len(self.entries)} cached answers")
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+class _DnsHandler(socketserver.BaseRequestHandler):
+
+    def handle(self) -> None:
+        query, sock = self.request
+        try:
+            response = self.server.cache.resolve(query)
+        except (IndexError, struct.error) as e:
+            logger.warning(f"Malformed DNS query from {self.client_address[0]}: {e}")
+            return
+        if response is not None:
+            sock.sendto(response, self.client_address)
+
+
+class DnsCacheServer(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+
+    def __init__(self, cache, address=LISTEN_ADDRESS, port=LISTEN_PORT):
+        self.cache = cache
+        super().__init__((address, port), _DnsHandler)
+
+
+def start_background(address=LISTEN_ADDRESS, port=LISTEN_PORT, path=CACHE_DB, upstreams=None) -> DnsCacheServer:
+    """Start the caching stub on a daemon thread; call shutdown_background() when the lookups are done."""
+    server = DnsCacheServer(DnsCache(path, upstreams), address, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"DNS cache listening on {address}:{port}, forwarding to {', '.join(server.cache.upstreams)}")
+    return server
+
+
+def shutdown_background(server) -> None:
+    server.shutdown()
+    server.server_close()
+    server.cache.log_stats()
+    server.cache.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Caching DNS stub for dnstwist --nameservers.")
+    parser.add_argument('--listen', default=LISTEN_ADDRESS)
+    parser.add_argument('--port', type=int, default=LISTEN_PORT)
+    parser.add_argument('--upstream', default=','.join(UPSTREAM_SERVERS), help="Comma separated upstream resolvers")
+    parser.add_argument('--db', default=CACHE_DB)
+    args = parser.parse_args()
+    server = DnsCacheServer(DnsCache(args.db, args.upstream.split(',')), args.listen, args.port)
+    logger.info(f"DNS cache listening on {args.listen}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.cache.log_stats()
+        server.cache.close()
+
+
+if __name__ == "__main__":
+    # Configured here rather than at import so twister keeps its own log format
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M%p',
+                        handlers=[
+                            RichHandler(show_time=True,
+                                        omit_repeated_times=False,
+                                        show_level=True,
+                                        show_path=True,
+                                        enable_link_path=True,
+                                        markup=True,
+                                        rich_tracebacks=True,
+                                        tracebacks_width=200,
+                                        tracebacks_show_locals=False,
+                                        tracebacks_theme='monokai',
+                                        tracebacks_extra_lines=0,
+                                        log_time_format='[%X]')
+                        ])
+    main()
@@ -0,0 +1,86 @@
+# findings.py
+import re
+import sys
+from dataclasses import dataclass
+
+TITLE_LINE = re.compile(r'^\| \[!\] Title: (.*)$')
+FIXED_IN_LINE = re.compile(r'^\|\s+Fixed in: (.*)$')
+REFERENCE_LINE = re.compile(r'^\|\s+- (.+)$')
+VERSION_LINE = re.compile(r'^\| Version: (\S+)')
+REFERENCE_URLS = {  # How wpscan prints the reference ids of its JSON output in text logs
+    'url': '{}',
+    'cve': 'https://cve.mitre.org/cgi-bin/cve.cgi?name=CVE-{}',
+    'wpvulndb': 'https://wpscan.com/vulnerability/{}'
+}
+
+
+@dataclass(slots=True)
+class Vulnerability:
+    title: str
+    fixed_in: str = ''
+    references: tuple[str, ...] = ()
+
+
+@dataclass(slots=True)
+class Finding:
+    """One plugin or theme of a scanned site, with its vulnerabilities parsed out of the details text.
+
+    site and item are interned, so the many findings of a site (and a plugin seen on many sites)
+    share one string; interesting_findings is only set on the first finding of a log.
+    """
+    site: str
+    item: str
+    vuln_count: str = ''
+    details: str = ''
+    interesting_findings: str = ''
+    version: str = ''
+    vulnerabilities: tuple[Vulnerability, ...] = ()
+
+    def __post_init__(self) -> None:
+        self.site = sys.intern(self.site)
+        self.item = sys.intern(self.item)
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state) -> None:
+        # Unpickling skips __init__, so findings parsed in pool workers are re-interned here
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+        self.__post_init__()
+
+    def as_row(self) -> list[str]:
+        """Cells of the Results sheet: Filename, Plugin/Theme, Vuln Count, Details, Interesting Findings."""
+        return [self.site, self.item, self.vuln_count, self.details, self.interesting_findings]
+
+
+def parse_details(detail_lines) -> tuple[str, tuple[Vulnerability, ...]]:
+    """Detected version and vulnerabilities from the stripped detail lines of a text-log item."""
+    version = ''
+    vulnerabilities = []
+    title = None
+    fixed_in = ''
+    references: list[str] = []
+    for line in detail_lines:
+        if match := TITLE_LINE.match(line):
+            if title is not None:
+                vulnerabilities.append(Vulnerability(title, fixed_in, tuple(references)))
+            title, fixed_in, references = match.group(1), '', []
+        elif title is not None and (match := FIXED_IN_LINE.match(line)):
+            fixed_in = match.group(1)
+        elif title is not None and (match := REFERENCE_LINE.match(line)):
+            references.append(match.group(1))
+        elif not version and (match := VERSION_LINE.match(line)):
+            version = match.group(1)
+    if title is not None:
+        vulnerabilities.append(Vulnerability(title, fixed_in, tuple(references)))
+    return version, tuple(vulnerabilities)
+
+
+def reference_urls(references) -> tuple[str, ...]:
+    """Flatten a wpscan JSON references object ({type: [ids]}) into the links the text log shows."""
+    return tuple(REFERENCE_URLS.get(ref_type, f'{ref_type}: {{}}').format(ref) for ref_type, refs in (references or {}).items() for ref in refs)
+
+
+def vulnerabilities_from_json(vulnerabilities) -> tuple[Vulnerability, ...]:
+    return tuple(Vulnerability(vuln.get('title', ''), vuln.get('fixed_in') or '', reference_urls(vuln.get('references'))) for vuln in vulnerabilities or [])
@@ -0,0 +1,93 @@
+# findingsRollup.py
+import os
+import logging
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # The summary sheets are skipped without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SITE_PLUGIN_SHEET = 'Site x Plugin'
+PLUGIN_VERSION_SHEET = 'Plugin Versions'
+PLUGIN_VULN_SHEET = 'Plugin Vulns'
+PLUGIN_VERSION_HEADERS = ['Plugin/Theme', 'Version', 'Sites', 'Total Vulns', 'Max Vulns Per Site']
+PLUGIN_VULN_HEADERS = ['Plugin/Theme', 'Sites', 'Versions Seen', 'Vulnerable Sites', 'Total Vulns', 'Max Vulns Per Site']
+
+
+def vuln_total(finding) -> int:
+    """The count wpscan printed for an item, or the number of parsed vulnerabilities when it printed none."""
+    return int(finding.vuln_count) if finding.vuln_count.isdigit() else len(finding.vulnerabilities)
+
+
+class FindingsTable:
+    """Findings as parallel arrays, with sites, items and versions factorized to integer codes once for every rollup."""
+
+    def __init__(self, log_findings):
+        sites = np.array([os.path.splitext(os.path.basename(finding.site))[0] for finding in log_findings], dtype=str)
+        items = np.array([finding.item for finding in log_findings], dtype=str)
+        versions = np.array([finding.version for finding in log_findings], dtype=str)
+        self.vulns = np.array([vuln_total(finding) for finding in log_findings], dtype=np.int64)
+        self.sites, self.site_codes = np.unique(sites, return_inverse=True)
+        self.items, self.item_codes = np.unique(items, return_inverse=True)
+        self.versions, self.version_codes = np.unique(versions, return_inverse=True)
+        # One cell per site and item holding its vuln count, -1 where the site does not have the item
+        self.matrix = np.full((len(self.sites), len(self.items)), -1, dtype=np.int64)
+        np.maximum.at(self.matrix, (self.site_codes, self.item_codes), self.vulns)
+
+
+def site_plugin_matrix(table) -> tuple[list[str], list[list[Any]]]:
+    """Sites by plugin/theme: each cell is the item's vuln count on that site, blank where the site does not have it."""
+    headers = ['Site', 'Items', 'Total Vulns'] + table.items.tolist()
+    cells = table.matrix.astype(object)
+    cells[table.matrix < 0] = None
+    installed = (table.matrix >= 0).sum(axis=1)
+    total = np.clip(table.matrix, 0, None).sum(axis=1)
+    rows = [[site, int(count), int(vulns)] + row for site, count, vulns, row in zip(table.sites.tolist(), installed, total, cells.tolist())]
+    return headers, rows
+
+
+def plugin_version_rollup(table) -> list[list[Any]]:
+    """One row per plugin/theme version: how many sites run it and the vulns it carries there."""
+    n_versions, n_sites = len(table.versions), len(table.sites)
+    # Deduplicate (item, version, site) first so an item listed twice in one log counts once
+    triples, triple_codes = np.unique((table.item_codes * n_versions + table.version_codes) * n_sites + table.site_codes, return_inverse=True)
+    triple_vulns = np.zeros(len(triples), dtype=np.int64)
+    np.maximum.at(triple_vulns, triple_codes, table.vulns)
+    pairs, pair_codes = np.unique(triples // n_sites, return_inverse=True)
+    sites = np.bincount(pair_codes, minlength=len(pairs))
+    total = np.bincount(pair_codes, weights=triple_vulns, minlength=len(pairs)).astype(np.int64)
+    worst = np.zeros(len(pairs), dtype=np.int64)
+    np.maximum.at(worst, pair_codes, triple_vulns)
+    # pairs come out of np.unique sorted, which is item then version order
+    return [[str(table.items[pair // n_versions]), str(table.versions[pair % n_versions]), count, vulns, most]
+            for pair, count, vulns, most in zip(pairs.tolist(), sites.tolist(), total.tolist(), worst.tolist())]
+
+
+def plugin_vuln_rollup(table) -> list[list[Any]]:
+    """One row per plugin/theme across all sites, most vulnerable first."""
+    installed = (table.matrix >= 0).sum(axis=0)
+    vulnerable = (table.matrix > 0).sum(axis=0)
+    total = np.clip(table.matrix, 0, None).sum(axis=0)
+    worst = table.matrix.max(axis=0)
+    versions_seen = np.bincount(np.unique(table.item_codes * len(table.versions) + table.version_codes) // len(table.versions), minlength=len(table.items))
+    order = np.lexsort((-installed, -total))
+    return [[str(table.items[i]), int(installed[i]), int(versions_seen[i]), int(vulnerable[i]), int(total[i]), int(max(worst[i], 0))] for i in order.tolist()]
+
+
+def write_rollups(writer, log_findings) -> bool:
+    """Add the cross-site summary tables to a reportWriter.ReportWriter."""
+    if np is None:
+        logger.warning("numpy is not installed, skipping the plugin summary sheets (pip install numpy).")
+        return False
+    if not log_findings:
+        return False
+    table = FindingsTable(log_findings)
+    headers, rows = site_plugin_matrix(table)
+    writer.add_table(SITE_PLUGIN_SHEET, headers, rows)
+    writer.add_table(PLUGIN_VERSION_SHEET, PLUGIN_VERSION_HEADERS, plugin_version_rollup(table))
+    writer.add_table(PLUGIN_VULN_SHEET, PLUGIN_VULN_HEADERS, plugin_vuln_rollup(table))
+    logger.info(f"Summarized {len(log_findings)} findings across {len(table.sites)} sites and {len(table.items)} plugins/themes")
+    return True
@@ -0,0 +1,260 @@
+# findingsStore.py
+import os
+import re
+import sys
+import csv
+import sqlite3
+import hashlib
+import logging
+import argparse
+import datetime
+from rich.logging import RichHandler
+import findings
+import wpscanLog
+
+logger = logging.getLogger(__name__)
+
+STORE_DB = 'output/findings.sqlite'
+WPSCAN_VULN_ID = re.compile(r'wpscan\.com/vulnerability/([0-9a-f-]+)', re.IGNORECASE)
+CVE_ID = re.compile(r'CVE-\d{4}-\d+', re.IGNORECASE)
+QUERY_HEADERS = ['Scan Date', 'Site', 'Plugin/Theme', 'Version', 'Vuln Count', 'Vuln ID', 'CVE', 'Title', 'Fixed In', 'Log']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    sha256 TEXT PRIMARY KEY,
+    txt_sha256 TEXT,
+    path TEXT NOT NULL,
+    site TEXT NOT NULL,
+    scan_date TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    parser_version INTEGER
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    log_sha256 TEXT NOT NULL REFERENCES logs(sha256),
+    site TEXT NOT NULL,
+    item TEXT NOT NULL,
+    version TEXT,
+    vuln_count TEXT,
+    details TEXT,
+    interesting_findings TEXT,
+    scan_date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vulnerabilities (
+    finding_id INTEGER NOT NULL REFERENCES findings(id),
+    vuln_id TEXT,
+    cve TEXT,
+    title TEXT NOT NULL,
+    fixed_in TEXT,
+    refs TEXT
+);
+CREATE INDEX IF NOT EXISTS findings_site_date ON findings(site, scan_date);
+CREATE INDEX IF NOT EXISTS findings_item_version ON findings(item, version);
+CREATE INDEX IF NOT EXISTS findings_scan_date ON findings(scan_date);
+CREATE INDEX IF NOT EXISTS vulnerabilities_finding ON vulnerabilities(finding_id);
+CREATE INDEX IF NOT EXISTS vulnerabilities_vuln_id ON vulnerabilities(vuln_id);
+CREATE INDEX IF NOT EXISTS vulnerabilities_cve ON vulnerabilities(cve);
+"""
+
+
+def connect(path=STORE_DB) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    migrate(conn)
+    return conn
+
+
+def migrate(conn) -> None:
+    """Add columns introduced after a store was created; their rows read as NULL, i.e. parsed by an unknown parser."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+    for column, kind in (('txt_sha256', 'TEXT'), ('parser_version', 'INTEGER')):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE logs ADD COLUMN {column} {kind}")
+    conn.execute("CREATE INDEX IF NOT EXISTS logs_txt_sha256 ON logs(txt_sha256)")
+    conn.commit()
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def site_of(log_path) -> str:
+    return os.path.splitext(os.path.basename(log_path))[0]
+
+
+def vulnerability_ids(vulnerability) -> tuple[str, str]:
+    """The WPScan vulnerability id and CVE a vulnerability's references point at, '' when absent."""
+    vuln_id = cve = ''
+    for reference in vulnerability.references:
+        if not vuln_id and (match := WPSCAN_VULN_ID.search(reference)):
+            vuln_id = match.group(1).lower()
+        if not cve and (match := CVE_ID.search(reference)):
+            cve = match.group(0).upper()
+    return vuln_id, cve
+
+
+def stored_log(conn, *hashes) -> tuple[str, int | None] | None:
+    """(key, parser version) of the log stored under any of hashes.
+
+    A log is found by its key (the hash of the file summarize was given, the untrimmed .log) and by
+    the hash of the text that was parsed (the trimmed .txt), so both ways of ingesting a scan meet.
+    """
+    for sha256 in hashes:
+        row = conn.execute("SELECT sha256, parser_version FROM logs WHERE sha256 = ? OR txt_sha256 = ?", (sha256, sha256)).fetchone()
+        if row is not None:
+            return row
+    return None
+
+
+def is_ingested(conn, sha256) -> bool:
+    """Whether the log is stored with findings from the current wpscanLog.PARSER_VERSION."""
+    row = stored_log(conn, sha256)
+    return row is not None and row[1] == wpscanLog.PARSER_VERSION
+
+
+def forget(conn, sha256) -> None:
+    """Remove a stored log and its findings, so it can be stored again."""
+    conn.execute("DELETE FROM vulnerabilities WHERE finding_id IN (SELECT id FROM findings WHERE log_sha256 = ?)", (sha256, ))
+    conn.execute("DELETE FROM findings WHERE log_sha256 = ?", (sha256, ))
+    conn.execute("DELETE FROM logs WHERE sha256 = ?", (sha256, ))
+
+
+def ingest(conn, log_path, log_findings: list[findings.Finding] | None = None, scan_date=None, sha256=None) -> bool:
+    """Store the findings of one log unless a log with the same content is already stored by the current parser.
+    Returns True when stored; findings from an older parser version are replaced.
+
+    Findings are parsed from the log when not given; scan_date defaults to the log's modification date.
+    sha256 is the log's content key, by default the hash of log_path itself; summarizeScans passes the
+    hash of the untrimmed log so it can look a log up before trimming and parsing it. The hash of
+    log_path is kept as well, so the same scan ingested from its trimmed .txt is not stored twice.
+    """
+    txt_sha256 = file_sha256(log_path)
+    sha256 = sha256 or txt_sha256
+    stored = stored_log(conn, sha256, txt_sha256)
+    if stored is not None and stored[1] == wpscanLog.PARSER_VERSION:
+        return False
+    if log_findings is None:
+        log_findings, _ = wpscanLog.parse_log(log_path)
+    scan_date = scan_date or datetime.date.fromtimestamp(os.path.getmtime(log_path)).isoformat()
+    site = site_of(log_path)
+    with conn:
+        if stored is not None:
+            forget(conn, stored[0])  # Parsed by an older parser version
+        conn.execute("INSERT INTO logs (sha256, txt_sha256, path, site, scan_date, ingested_at, parser_version) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (sha256, txt_sha256, os.path.abspath(log_path), site, scan_date, datetime.datetime.now().isoformat(timespec='seconds'), wpscanLog.PARSER_VERSION))
+        for finding in log_findings:
+            cursor = conn.execute(
+                "INSERT INTO findings (log_sha256, site, item, version, vuln_count, details, interesting_findings, scan_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, site, finding.item, finding.version, finding.vuln_count, finding.details, finding.interesting_findings, scan_date))
+            conn.executemany("INSERT INTO vulnerabilities (finding_id, vuln_id, cve, title, fixed_in, refs) VALUES (?, ?, ?, ?, ?, ?)",
+                             [(cursor.lastrowid, *vulnerability_ids(vulnerability), vulnerability.title, vulnerability.fixed_in, '\n'.join(vulnerability.references))
+                              for vulnerability in finding.vulnerabilities])
+    return True
+
+
+def load_findings(conn, sha256, site) -> list[findings.Finding]:
+    """The findings stored for the log with content hash sha256 (either of its hashes), in parse order, as parsed from `site`."""
+    stored = stored_log(conn, sha256)
+    if stored is None:
+        return []
+    sha256 = stored[0]
+    vulnerabilities: dict[int, list[findings.Vulnerability]] = {}
+    for finding_id, title, fixed_in, refs in conn.execute(
+            "SELECT v.finding_id, v.title, v.fixed_in, v.refs FROM vulnerabilities v JOIN findings f ON f.id = v.finding_id "
+            "WHERE f.log_sha256 = ? ORDER BY v.rowid", (sha256, )):
+        vulnerabilities.setdefault(finding_id, []).append(findings.Vulnerability(title, fixed_in or '', tuple(refs.split('\n')) if refs else ()))
+    return [
+        findings.Finding(site, item, vuln_count or '', details or '', interesting_findings or '', version or '', tuple(vulnerabilities.get(finding_id, ())))
+        for finding_id, item, vuln_count, details, interesting_findings, version in conn.execute(
+            "SELECT id, item, vuln_count, details, interesting_findings, version FROM findings WHERE log_sha256 = ? ORDER BY id", (sha256, ))
+    ]
+
+
+def ingest_dir(input_dir, scan_date=None, path=STORE_DB) -> tuple[int, int]:
+    """Ingest every .txt/.log WPScan log under input_dir. Returns (stored, skipped) counts."""
+    conn = connect(path)
+    stored = skipped = 0
+    try:
+        for root, _, files in os.walk(input_dir):
+            for file in sorted(files):
+                if file.endswith(('.txt', '.log')):
+                    if ingest(conn, os.path.join(root, file), scan_date=scan_date):
+                        stored += 1
+                    else:
+                        skipped += 1
+    finally:
+        conn.close()
+    logger.info(f"Findings store: {stored} logs ingested, {skipped} already stored, from {input_dir}")
+    return stored, skipped
+
+
+def query(conn, site=None, item=None, version=None, vuln=None, since=None, until=None) -> list[list[str]]:
+    """Findings (one row per vulnerability, or one per finding without any) matching every given filter, formatted for QUERY_HEADERS."""
+    clauses, params = [], []
+    for clause, value in (("f.site = ?", site), ("f.item = ?", item), ("f.version = ?", version), ("f.scan_date >= ?", since), ("f.scan_date <= ?", until)):
+        if value:
+            clauses.append(clause)
+            params.append(value)
+    if vuln:
+        clauses.append("f.id IN (SELECT finding_id FROM vulnerabilities WHERE vuln_id = ? OR cve = ?)")
+        params.extend((vuln.lower(), vuln.upper()))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    rows = conn.execute(
+        "SELECT f.scan_date, f.site, f.item, f.version, f.vuln_count, v.vuln_id, v.cve, v.title, v.fixed_in, l.path "
+        "FROM findings f JOIN logs l ON l.sha256 = f.log_sha256 LEFT JOIN vulnerabilities v ON v.finding_id = f.id "
+        f"{where} ORDER BY f.scan_date, f.site, f.item", params).fetchall()
+    return [['' if value is None else value for value in row] for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="History of WPScan findings across summarize runs.")
+    parser.add_argument('--db', default=STORE_DB)
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = sub.add_parser('ingest', help="Ingest WPScan logs from a directory, skipping ones already stored")
+    ingest_parser.add_argument('directory')
+    ingest_parser.add_argument('--date', help="Scan date (YYYY-MM-DD), defaults to each log's modification date")
+    query_parser = sub.add_parser('query', help="List stored findings as CSV")
+    query_parser.add_argument('--site', help="Site name, as in the log file name")
+    query_parser.add_argument('--item', help="Plugin or theme slug")
+    query_parser.add_argument('--version')
+    query_parser.add_argument('--vuln', help="WPScan vulnerability id or CVE")
+    query_parser.add_argument('--since', help="ISO date")
+    query_parser.add_argument('--until', help="ISO date")
+    args = parser.parse_args()
+    if args.command == 'ingest':
+        ingest_dir(args.directory, args.date, args.db)
+    elif args.command == 'query':
+        conn = connect(args.db)
+        try:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(QUERY_HEADERS)
+            writer.writerows(query(conn, args.site, args.item, args.version, args.vuln, args.since, args.until))
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    # Configured here rather than at import so summarizeScans keeps its own log format
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M%p',
+                        handlers=[
+                            RichHandler(show_time=True,
+                                        omit_repeated_times=False,
+                                        show_level=True,
+                                        show_path=True,
+                                        enable_link_path=True,
+                                        markup=True,
+                                        rich_tracebacks=True,
+                                        tracebacks_width=200,
+                                        tracebacks_show_locals=False,
+                                        tracebacks_theme='monokai',
+                                        tracebacks_extra_lines=0,
+                                        log_time_format='[%X]')
+                        ])
+    main()
@@ -0,0 +1,205 @@
+# jobQueue.py
+import os
+import sys
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+from rich.logging import RichHandler
+import WPScanner
+import scanScheduler
+from scanScheduler import ScanJob
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    datefmt='%H:%M%p',
+                    handlers=[
+                        RichHandler(show_time=True,
+                                    omit_repeated_times=False,
+                                    show_level=True,
+                                    show_path=True,
+                                    enable_link_path=True,
+                                    markup=True,
+                                    rich_tracebacks=True,
+                                    tracebacks_width=200,
+                                    tracebacks_show_locals=False,
+                                    tracebacks_theme='monokai',
+                                    tracebacks_extra_lines=0,
+                                    log_time_format='[%X]')
+                    ])
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DB = 'output/jobs.sqlite'
+LEASE_SECONDS = 15 * 60  # A worker that misses heartbeats for this long loses its job
+MAX_ATTEMPTS = 3  # Leases handed out for one job before it is marked failed
+POLL_SECONDS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    tool TEXT NOT NULL,
+    group_name TEXT NOT NULL,
+    target TEXT NOT NULL,
+    config_file TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'queued',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, lease_expires);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active ON jobs(tool, target) WHERE state IN ('queued', 'leased');
+"""
+
+
+def connect(path=QUEUE_DB) -> sqlite3.Connection:
+    """Open the queue. Rollback journal (not WAL) so the file also works on a share mounted by several hosts."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def enqueue(conn, jobs) -> int:
+    """Queue jobs, ignoring targets that already have a queued or leased job for the same tool."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO jobs (tool, group_name, target, config_file, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(job.tool, job.group, job.target, job.config_file, now, now) for job in jobs])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return conn.total_changes - before
+
+
+def requeue_expired(conn, now) -> None:
+    """Put jobs whose lease ran out back in the queue, or fail them once they used up their attempts."""
+    conn.execute("UPDATE jobs SET state = 'failed', lease_owner = NULL, last_error = 'lease expired', updated_at = ? "
+                 "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, now, MAX_ATTEMPTS))
+    conn.execute("UPDATE jobs SET state = 'queued', lease_owner = NULL, updated_at = ? WHERE state = 'leased' AND lease_expires < ?", (now, now))
+
+
+def lease(conn, worker_id, lease_seconds=LEASE_SECONDS) -> tuple[int, ScanJob] | None:
+    """Atomically take the oldest queued job for worker_id."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        requeue_expired(conn, now)
+        row = conn.execute("SELECT * FROM jobs WHERE state = 'queued' ORDER BY id LIMIT 1").fetchone()
+        if row is not None:
+            conn.execute("UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                         (worker_id, now + lease_seconds, now, row['id']))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if row is None:
+        return None
+    return row['id'], ScanJob(row['tool'], row['group_name'], row['target'], row['config_file'])
+
+
+def heartbeat(conn, job_id, worker_id, lease_seconds=LEASE_SECONDS) -> bool:
+    """Extend a lease. Returns False if the worker no longer owns the job."""
+    now = time.time()
+    cursor = conn.execute("UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                          (now + lease_seconds, now, job_id, worker_id))
+    return cursor.rowcount == 1
+
+
+def complete(conn, job_id, worker_id, ok, error=None) -> bool:
+    """Mark a leased job done or failed. Failed jobs go back in the queue until they use up MAX_ATTEMPTS."""
+    now = time.time()
+    if ok:
+        cursor = conn.execute("UPDATE jobs SET state = 'done', lease_owner = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                              (now, job_id, worker_id))
+    else:
+        cursor = conn.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, lease_owner = NULL, "
+                              "last_error = ?, updated_at = ? WHERE id = ? AND lease_owner = ?", (MAX_ATTEMPTS, error, now, job_id, worker_id))
+    return cursor.rowcount == 1
+
+
+def status(conn) -> dict[str, int]:
+    return {row['state']: row['count'] for row in conn.execute("SELECT state, COUNT(*) AS count FROM jobs GROUP BY state")}
+
+
+def work(path, worker_id, lease_seconds=LEASE_SECONDS, drain=False) -> None:
+    """Lease and run jobs until the queue is empty (drain) or forever."""
+    conn = connect(path)
+    while True:
+        leased = lease(conn, worker_id, lease_seconds)
+        if leased is None:
+            if drain:
+                logger.info(f"{worker_id}: queue drained.")
+                return
+            time.sleep(POLL_SECONDS)
+            continue
+        job_id, job = leased
+        logger.info(f"{worker_id}: leased job {job_id} ({job.tool} {job.target})")
+        stop = threading.Event()
+
+        def keep_alive(job_id=job_id) -> None:
+            beat_conn = connect(path)
+            try:
+                while not stop.wait(lease_seconds / 3):
+                    if not heartbeat(beat_conn, job_id, worker_id, lease_seconds):
+                        logger.warning(f"{worker_id}: lost the lease on job {job_id}")
+                        return
+            finally:
+                beat_conn.close()
+
+        beat = threading.Thread(target=keep_alive, daemon=True)
+        beat.start()
+        error = None
+        try:
+            if job.tool == "wpscan":
+                WPScanner.ensure_wpscan_updated()
+            ok = scanScheduler.run_job(job)
+        except Exception as e:
+            ok, error = False, str(e)
+            logger.error(f"{worker_id}: job {job_id} raised {e}")
+        finally:
+            stop.set()
+            beat.join()
+        if not complete(conn, job_id, worker_id, ok, error or (None if ok else "scan failed")):
+            logger.warning(f"{worker_id}: job {job_id} was re-leased before it completed, result discarded")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Durable scan job queue shared by worker processes.")
+    parser.add_argument('--db', default=QUEUE_DB, help="Path to the queue SQLite file")
+    sub = parser.add_subparsers(dest='command', required=True)
+    enqueue_parser = sub.add_parser('enqueue', help="Queue one job per target of the given domain lists")
+    enqueue_parser.add_argument('groups', nargs='+')
+    enqueue_parser.add_argument('--tool', choices=['wpscan', 'dnstwist', 'both'], default='both')
+    work_parser = sub.add_parser('work', help="Lease and run jobs")
+    work_parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    work_parser.add_argument('--lease', type=int, default=LEASE_SECONDS, help="Lease length in seconds")
+    work_parser.add_argument('--drain', action='store_true', help="Exit once the queue is empty")
+    sub.add_parser('status', help="Show job counts per state")
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        tools = ['wpscan', 'dnstwist'] if args.tool == 'both' else [args.tool]
+        added = enqueue(connect(args.db), scanScheduler.build_jobs(args.groups, tools))
+        logger.info(f"Queued {added} jobs in {args.db}")
+    elif args.command == 'work':
+        work(args.db, args.worker_id, args.lease, args.drain)
+    elif args.command == 'status':
+        for state, count in sorted(status(connect(args.db)).items()):
+            logger.info(f"{state}: {count}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(1)
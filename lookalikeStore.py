@@ -0,0 +1,159 @@
+# lookalikeStore.py
+import os
+import sys
+import csv
+import sqlite3
+import logging
+import argparse
+import datetime
+from rich.logging import RichHandler
+
+logger = logging.getLogger(__name__)
+
+STORE_DB = 'output/lookalikes.sqlite'
+TRACKED_FIELDS = ('dns_a', 'dns_aaaa', 'dns_mx', 'dns_ns', 'phash')  # A change in any of these marks a registration as changed
+REPORT_HEADERS = ['Status', 'Domain', 'Source', 'Fuzzer', 'First Seen', 'Last Seen', 'Changed On', 'IP Address', 'IPv6', 'MX', 'NS', 'PHASH']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookalikes (
+    domain TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fuzzer TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    changed_on TEXT NOT NULL,
+    dns_a TEXT, dns_aaaa TEXT, dns_mx TEXT, dns_ns TEXT, phash TEXT,
+    PRIMARY KEY (domain, source)
+);
+CREATE INDEX IF NOT EXISTS lookalikes_first_seen ON lookalikes(first_seen);
+CREATE INDEX IF NOT EXISTS lookalikes_changed_on ON lookalikes(changed_on);
+CREATE INDEX IF NOT EXISTS lookalikes_last_seen ON lookalikes(last_seen);
+CREATE TABLE IF NOT EXISTS ingested (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    run_date TEXT NOT NULL
+);
+"""
+
+
+def connect(path=STORE_DB) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def already_ingested(conn, csv_path) -> bool:
+    stat = os.stat(csv_path)
+    row = conn.execute("SELECT size, mtime FROM ingested WHERE path = ?", (os.path.abspath(csv_path), )).fetchone()
+    return row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime
+
+
+def merge_csv(conn, csv_path, run_date) -> tuple[int, int]:
+    """Merge one dnstwist CSV into the store. Returns (new, changed) registration counts."""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        rows = [row for row in csv.DictReader(file) if row.get('domain')]
+    originals = [row['domain'] for row in rows if row.get('fuzzer') == '*original']
+    source = originals[0] if originals else os.path.splitext(os.path.basename(csv_path))[0]
+    new = changed = 0
+    for row in rows:
+        if row.get('fuzzer') == '*original':
+            continue
+        values = tuple(row.get(field, '') or '' for field in TRACKED_FIELDS)
+        existing = conn.execute(f"SELECT {', '.join(TRACKED_FIELDS)} FROM lookalikes WHERE domain = ? AND source = ?", (row['domain'], source)).fetchone()
+        if existing is None:
+            conn.execute(f"INSERT INTO lookalikes (domain, source, fuzzer, first_seen, last_seen, changed_on, {', '.join(TRACKED_FIELDS)}) "
+                         f"VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(TRACKED_FIELDS))})", (row['domain'], source, row.get('fuzzer'), run_date, run_date, run_date) + values)
+            new += 1
+        elif tuple(existing) != values:
+            conn.execute(f"UPDATE lookalikes SET last_seen = ?, changed_on = ?, {', '.join(f'{field} = ?' for field in TRACKED_FIELDS)} WHERE domain = ? AND source = ?",
+                         (run_date, run_date) + values + (row['domain'], source))
+            changed += 1
+        else:
+            conn.execute("UPDATE lookalikes SET last_seen = ? WHERE domain = ? AND source = ? AND last_seen < ?", (run_date, row['domain'], source, run_date))
+    return new, changed
+
+
+def merge_files(csv_paths, run_date=None, path=STORE_DB) -> tuple[int, int]:
+    """Merge the given dnstwist CSVs that have not been merged yet, oldest first. Returns (new, changed) counts.
+
+    Without an explicit run_date each CSV is dated by its modification time, so a backlog of runs merges in order.
+    """
+    conn = connect(path)
+    total_new = total_changed = 0
+    try:
+        for csv_path in sorted(csv_paths, key=os.path.getmtime):
+            if already_ingested(conn, csv_path):
+                continue
+            stat = os.stat(csv_path)
+            csv_date = run_date or datetime.date.fromtimestamp(stat.st_mtime).isoformat()
+            with conn:
+                new, changed = merge_csv(conn, csv_path, csv_date)
+                conn.execute("INSERT OR REPLACE INTO ingested (path, size, mtime, run_date) VALUES (?, ?, ?, ?)",
+                             (os.path.abspath(csv_path), stat.st_size, stat.st_mtime, csv_date))
+            total_new += new
+            total_changed += changed
+    finally:
+        conn.close()
+    return total_new, total_changed
+
+
+def merge_dir(input_dir, run_date=None, path=STORE_DB) -> tuple[int, int]:
+    """Merge every dnstwist CSV under input_dir that has not been merged yet. Returns (new, changed) counts."""
+    csv_paths = [os.path.join(root, file) for root, _, files in os.walk(input_dir) for file in files if file.endswith('.csv')]
+    total_new, total_changed = merge_files(csv_paths, run_date, path)
+    logger.info(f"Lookalike store: {total_new} new and {total_changed} changed registrations from {input_dir}")
+    return total_new, total_changed
+
+
+def new_or_changed(since, path=STORE_DB) -> list[list[str]]:
+    """Rows for registrations first seen or changed on or after `since` (ISO date), formatted for REPORT_HEADERS."""
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT CASE WHEN first_seen >= ? THEN 'New' ELSE 'Changed' END, domain, source, fuzzer, first_seen, last_seen, changed_on, "
+            "dns_a, dns_aaaa, dns_mx, dns_ns, phash FROM lookalikes WHERE first_seen >= ? OR changed_on >= ? ORDER BY source, domain", (since, since, since)).fetchall()
+    finally:
+        conn.close()
+    return [list(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="History of registered lookalike domains found by dnstwist.")
+    parser.add_argument('--db', default=STORE_DB)
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = sub.add_parser('ingest', help="Merge dnstwist CSVs from a directory")
+    ingest_parser.add_argument('directory')
+    ingest_parser.add_argument('--date', help="Run date (YYYY-MM-DD), defaults to each CSV's modification date")
+    report_parser = sub.add_parser('report', help="List new or changed registrations")
+    report_parser.add_argument('--since', default=datetime.date.today().isoformat(), help="ISO date, defaults to today")
+    args = parser.parse_args()
+    if args.command == 'ingest':
+        merge_dir(args.directory, args.date, args.db)
+    elif args.command == 'report':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(new_or_changed(args.since, args.db))
+
+
+if __name__ == "__main__":
+    # Configured here rather than at import so summarizeScans keeps its own log format
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M%p',
+                        handlers=[
+                            RichHandler(show_time=True,
+                                        omit_repeated_times=False,
+                                        show_level=True,
+                                        show_path=True,
+                                        enable_link_path=True,
+                                        markup=True,
+                                        rich_tracebacks=True,
+                                        tracebacks_width=200,
+                                        tracebacks_show_locals=False,
+                                        tracebacks_theme='monokai',
+                                        tracebacks_extra_lines=0,
+                                        log_time_format='[%X]')
+                        ])
+    main()
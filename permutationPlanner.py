@@ -0,0 +1,101 @@
+# permutationPlanner.py
+import os
+import re
+import queue
+import logging
+from collections import defaultdict
+
+try:
+    import dnstwist
+except ImportError:  # dnstwist is normally only installed as a CLI
+    dnstwist = None
+
+logger = logging.getLogger(__name__)
+
+subdomain_pattern = re.compile(r'^(?:(?:xn--)[a-z0-9-]{3,59}|[a-z0-9-]{1,63})$')
+tld_pattern = re.compile(r'^[a-z0-9-]{2,63}(?:\.[a-z0-9-]{2,63})?$')
+
+
+def read_wordlist(path, pattern) -> list[str]:
+    """Read a dnstwist dictionary/TLD file with the same filtering dnstwist applies."""
+    with open(path, 'r', encoding='utf-8') as file:
+        return sorted(word for word in set(file.read().lower().splitlines()) if pattern.match(word))
+
+
+def plan_group(urls, fuzzers, dictionary, tld_dictionary) -> dict[str, list[tuple[str, str]]]:
+    """Generate the fuzzed candidates of every source domain up front.
+
+    Returns candidate -> [(source url, fuzzer), ...], so a candidate shared by several
+    brands (same TLD swap, same dictionary word) appears once.
+    """
+    plan: dict[str, list[tuple[str, str]]] = defaultdict(list)
+    total = 0
+    for url in urls:
+        fuzzer = dnstwist.Fuzzer(dnstwist.UrlParser(url).domain, dictionary=list(dictionary), tld_dictionary=list(tld_dictionary))
+        fuzzer.generate(fuzzers=fuzzers)
+        for permutation in fuzzer.domains:
+            plan[permutation['domain']].append((url, permutation['fuzzer']))
+        total += len(fuzzer.domains)
+    logger.info(f"Planned {total} permutations for {len(urls)} domains, {len(plan)} unique ({total - len(plan)} shared lookups saved)")
+    return plan
+
+
+def resolve_candidates(candidates, nameservers, threads, geoip=False, banners=False) -> dict[str, dict]:
+    """Resolve each unique candidate once with dnstwist's own scanner threads.
+
+    Only source-independent checks run here (DNS, GeoIP, HTTP/SMTP banners); checks that compare
+    a candidate against its source site (mxcheck, LSH, pHash, screenshots) are left to dnstwist itself.
+    """
+    jobs = queue.Queue()
+    for candidate in candidates:
+        jobs.put(dnstwist.Permutation(fuzzer='', domain=candidate))
+    tasks = list(jobs.queue)
+    workers = []
+    for _ in range(max(1, threads)):
+        worker = dnstwist.Scanner(jobs)
+        worker.option_extdns = dnstwist.MODULE_DNSPYTHON
+        worker.option_geoip = geoip and dnstwist.MODULE_GEOIP
+        worker.option_banners = banners
+        worker.nameservers = nameservers
+        worker.useragent = dnstwist.USER_AGENT_STRING
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+    return {task['domain']: task for task in tasks}
+
+
+def attribute_results(plan, resolved) -> dict[str, list]:
+    """Fan resolved candidates back out to every source domain they were generated from."""
+    per_source: dict[str, list] = defaultdict(list)
+    for candidate, sources in plan.items():
+        task = resolved.get(candidate)
+        if task is None or not task.is_registered():
+            continue
+        for url, fuzzer in sources:
+            row = task.copy()
+            row['fuzzer'] = fuzzer
+            per_source[url].append(row)
+    return per_source
+
+
+def run_planned_group(urls, output_folder, fuzzers, dictionary_file, tld_file, nameservers, threads, output_name) -> dict[str, str]:
+    """Plan, resolve and write one dnstwist-format CSV per source domain. Returns url -> CSV path."""
+    if dnstwist is None:
+        logger.error("The dnstwist Python module is required for planned lookups (pip install dnstwist).")
+        return {}
+    dictionary = read_wordlist(dictionary_file, subdomain_pattern)
+    tld_dictionary = read_wordlist(tld_file, tld_pattern)
+    plan = plan_group(urls, fuzzers, dictionary, tld_dictionary)
+    resolved = resolve_candidates(plan.keys(), nameservers, threads, geoip=True, banners=True)
+    per_source = attribute_results(plan, resolved)
+    os.makedirs(output_folder, exist_ok=True)
+    outputs = {}
+    for url in urls:
+        rows = sorted(per_source.get(url, []))
+        output_file = output_name(url)
+        with open(output_file, 'w', encoding='utf-8') as file:
+            file.write(dnstwist.Format(rows).csv() + '\n')
+        logger.info(f"{len(rows)} registered lookalikes of {url} written to {output_file}")
+        outputs[url] = output_file
+    return outputs
@@ -0,0 +1,133 @@
+# rateLimiter.py
+import re
+import time
+import socket
+import logging
+import ipaddress
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+START_RATE = 2.0  # Scan starts per minute allowed against one network
+MIN_RATE = 0.25
+MAX_RATE = 6.0
+BURST = 2  # Scan starts that may go out back to back on a fresh bucket
+SPIKE_THRESHOLD = 5  # Throttling responses within SPIKE_WINDOW seconds that count as a spike
+SPIKE_WINDOW = 60
+BASE_COOLDOWN = 60  # Seconds a network rests after its first spike, doubled for each spike in a row
+
+# Only scanner error lines count: vulnerability titles ("Login Rate Limit Bypass"), plugin names and
+# "Status: 403" on found files are ordinary results, not throttling
+throttle_pattern = re.compile(
+    r'HTTP Error\b.*\b(?:429|403)\b'  # wpscan/Typhoeus request errors, e.g. "HTTP Error: <url> (status: 429)"
+    r'|Scan Aborted:.*(?:\b(?:429|403)\b|WAF|rate limit)'  # "Scan Aborted: The target is responding with a 403, this might be due to a WAF"
+    r'|responding with a (?:429|403)\b'
+    r'|\b429 Too Many Requests\b', re.IGNORECASE)
+
+
+class TokenBucket:
+    """Token bucket with an adjustable rate (tokens per minute) and a cooldown after spikes."""
+
+    def __init__(self, rate=START_RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0
+        self.spikes = 0
+        self.throttled = deque()
+
+    def prune_throttled(self, now) -> None:
+        """Forget throttling responses older than SPIKE_WINDOW."""
+        while self.throttled and now - self.throttled[0] > SPIKE_WINDOW:
+            self.throttled.popleft()
+
+    def _refill(self, now) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate / 60)
+        self.updated = now
+
+    def wait_time(self, now) -> float:
+        """Seconds until a token can be taken; takes it and returns 0 when one is available."""
+        self._refill(now)
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * 60 / self.rate
+
+
+class HostRateLimiter:
+    """Spaces out scans per network and backs off when the scanner output shows throttling.
+
+    Targets are keyed by the /24 (IPv4) or /48 (IPv6) of their resolved address, a cheap
+    stand-in for ASN that groups sites served from the same CDN or WAF edge.
+    """
+
+    def __init__(self, rate=START_RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._keys: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def key_for(self, target) -> str:
+        host = target.split('//')[-1].split('/')[0].split(':')[0].lower()
+        with self._lock:
+            if host in self._keys:
+                return self._keys[host]
+        try:
+            address = ipaddress.ip_address(socket.gethostbyname(host))
+            prefix = 24 if address.version == 4 else 48
+            key = str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+        except (OSError, ValueError):
+            key = host
+        with self._lock:
+            self._keys[host] = key
+        return key
+
+    def _bucket(self, key) -> TokenBucket:
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return self._buckets[key]
+
+    def acquire(self, target) -> None:
+        """Block until a scan of target may start."""
+        key = self.key_for(target)
+        while True:
+            with self._lock:
+                delay = self._bucket(key).wait_time(time.monotonic())
+            if delay <= 0:
+                return
+            logger.info(f"Rate limiting {target} ({key}) for {delay:.0f}s")
+            time.sleep(min(delay, 30))
+
+    def observe(self, target, line) -> None:
+        """Feed one line of scanner output; a burst of 429/403 responses halves the network's rate."""
+        if not throttle_pattern.search(line):
+            return
+        key = self.key_for(target)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.throttled.append(now)
+            bucket.prune_throttled(now)
+            if len(bucket.throttled) < SPIKE_THRESHOLD:
+                return
+            bucket.throttled.clear()
+            bucket.spikes += 1
+            bucket.rate = max(MIN_RATE, bucket.rate / 2)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.cooldown_until = now + BASE_COOLDOWN * 2 ** (bucket.spikes - 1)
+            logger.warning(f"Throttling detected on {key}, backing off to {bucket.rate:.2f} scans/min for {BASE_COOLDOWN * 2 ** (bucket.spikes - 1)}s")
+
+    def release(self, target, ok) -> None:
+        """Report a finished scan; clean finishes slowly raise the network's rate again."""
+        key = self.key_for(target)
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.prune_throttled(time.monotonic())  # A few stray 429s below the spike threshold must not block recovery forever
+            if ok and not bucket.throttled:
+                bucket.spikes = 0
+                bucket.rate = min(MAX_RATE, bucket.rate + 0.5)
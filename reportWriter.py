@@ -0,0 +1,416 @@
+# reportWriter.py
+import os
+import re
+import csv
+import html
+import json
+import shutil
+import logging
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Any, Iterable
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, PatternFill, Font, Alignment
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # The parquet format falls back to csv without pyarrow
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+RESULTS_SHEET = 'Results'
+RESULTS_HEADERS = ["Filename", "Plugin/Theme", "Vuln Count", "Details", "Interesting Findings"]
+PURPLE = "9370DB"
+LIGHT_PURPLE = "E6E6FA"
+# Control characters Excel cells cannot hold, removed in one str.translate pass
+ILLEGAL_CHARS = dict.fromkeys([*range(0x00, 0x09), *range(0x0b, 0x20), *range(0x7f, 0xa0)])
+PARQUET_BATCH_ROWS = 10000  # Rows buffered per Parquet row group
+
+
+def sanitize(value: Any) -> Any:
+    """Remove characters that cannot be used in Excel."""
+    return value.translate(ILLEGAL_CHARS) if isinstance(value, str) else value
+
+
+def results_styles() -> dict[str, NamedStyle]:
+    """Header and alternating row styles of the Results sheet, registered once per workbook."""
+    font = Font(name="Open Sans", size=10)
+    alignment = Alignment(horizontal="center", vertical="center")
+    return {
+        name: NamedStyle(name=name, font=font, alignment=alignment, fill=PatternFill(start_color=color, end_color=color, fill_type="solid"))
+        for name, color in (('results_header', PURPLE), ('results_dark', PURPLE), ('results_light', LIGHT_PURPLE))
+    }
+
+
+def sheet_slug(title) -> str:
+    """A sheet title made safe for a file name."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(title)).strip('_') or 'sheet'
+
+
+class ReportWriter(ABC):
+    """A report made of a Results sheet plus named tables, written as rows arrive and finished on close.
+
+    Spreadsheet backends also keep a raw sheet per log and tables whose rows need not match their
+    headers; the others skip raw sheets, and callers leave ragged tables out for them.
+    """
+
+    extension = ''
+    spreadsheet = False
+
+    def __init__(self, output_file, results_headers=RESULTS_HEADERS):
+        self.output_file = output_file
+        self.results_headers = results_headers
+        self.results_rows = 0
+        self.paths: list[str] = []  # Files written so far; output_file itself may not be one of them
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def sheet_path(self, title) -> str:
+        """Where a file-per-table backend writes the table `title`: next to the report, suffixed with the title."""
+        return f"{os.path.splitext(self.output_file)[0]}_{sheet_slug(title)}{self.extension}"
+
+    @abstractmethod
+    def add_results(self, rows: Iterable[list[Any]]) -> None:
+        """Append rows to the Results sheet."""
+
+    def add_raw_sheet(self, title, lines: Iterable[str]) -> None:
+        """Raw log lines only exist in spreadsheet reports; the trimmed logs are kept in the backup folder."""
+
+    @abstractmethod
+    def add_table(self, title, headers, rows: Iterable[list[Any]], styled=True) -> None:
+        """Add a named table with its own headers."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Finish the report; safe to call more than once."""
+
+
+class ExcelReportWriter(ReportWriter):
+    """WPScan workbook written in openpyxl's write-only mode.
+
+    Rows go straight to the sheet's temporary XML as they are appended, styles are shared
+    named styles rather than per-cell objects, and the file is saved exactly once on close.
+    The Results sheet is left out when results_headers is None.
+    """
+
+    extension = '.xlsx'
+    spreadsheet = True
+
+    def __init__(self, output_file, results_headers=RESULTS_HEADERS):
+        super().__init__(output_file, results_headers)
+        self.workbook = openpyxl.Workbook(write_only=True)
+        for style in results_styles().values():
+            self.workbook.add_named_style(style)
+        self.results_sheet = None
+        self.written = False  # Nothing is saved when no sheet or result row was added
+        if results_headers is not None:
+            self.results_sheet = self.workbook.create_sheet(RESULTS_SHEET)
+            self._append_results(results_headers, 'results_header')
+
+    @staticmethod
+    def _append_styled(sheet, values, style) -> None:
+        row = []
+        for value in values:
+            cell = WriteOnlyCell(sheet, value=sanitize(value))
+            cell.style = style
+            row.append(cell)
+        sheet.append(row)
+
+    def _append_results(self, values, style) -> None:
+        self._append_styled(self.results_sheet, values, style)
+        self.results_rows += 1
+
+    def add_results(self, rows: Iterable[list[Any]]) -> None:
+        """Append rows to the Results sheet, alternating the two row fills."""
+        for values in rows:
+            self._append_results(values, 'results_dark' if self.results_rows % 2 else 'results_light')
+            self.written = True
+
+    def add_raw_sheet(self, title, lines: Iterable[str]) -> None:
+        """A sheet holding one source line per row in column A."""
+        sheet = self.workbook.create_sheet(title)
+        self.written = True
+        for line in lines:
+            sheet.append([sanitize(line)])
+
+    def add_table(self, title, headers, rows: Iterable[list[Any]], styled=True) -> None:
+        """A summary sheet styled like Results (purple header, alternating row fills), or plain values when not styled."""
+        sheet = self.workbook.create_sheet(title)
+        self.written = True
+        if not styled:
+            if headers:
+                sheet.append([sanitize(value) for value in headers])
+            for values in rows:
+                sheet.append([sanitize(value) for value in values])
+            return
+        self._append_styled(sheet, headers, 'results_header')
+        for i, values in enumerate(rows, 1):
+            self._append_styled(sheet, values, 'results_dark' if i % 2 else 'results_light')
+
+    def close(self) -> None:
+        if self.workbook is None:
+            return
+        if not self.written:
+            self.workbook = None
+            return
+        os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+        self.workbook.save(self.output_file)
+        self.paths.append(self.output_file)
+        self.workbook = None
+        logger.info(f"Saved {self.output_file} ({max(self.results_rows - 1, 0)} result rows)")
+
+
+class CsvReportWriter(ReportWriter):
+    """Results in output_file and each table in its own CSV next to it, streamed row by row."""
+
+    extension = '.csv'
+
+    def __init__(self, output_file, results_headers=RESULTS_HEADERS):
+        super().__init__(output_file, results_headers)
+        self.files = []
+        self.results_writer = None  # Opened on the first result row, so a run without results leaves no file
+
+    def _open(self, path, headers) -> Any:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        file = open(path, 'w', encoding='utf-8', newline='')
+        self.files.append(file)
+        self.paths.append(path)
+        writer = csv.writer(file)
+        if headers:
+            writer.writerow(headers)
+        return writer
+
+    def add_results(self, rows: Iterable[list[Any]]) -> None:
+        for values in rows:
+            if self.results_writer is None:
+                self.results_writer = self._open(self.output_file, self.results_headers)
+            self.results_writer.writerow(values)
+            self.results_rows += 1
+
+    def add_table(self, title, headers, rows: Iterable[list[Any]], styled=True) -> None:
+        self._open(self.sheet_path(title), headers).writerows(rows)
+
+    def close(self) -> None:
+        for file in self.files:
+            file.close()
+        if self.files:
+            logger.info(f"Saved {self.output_file} ({self.results_rows} result rows, {len(self.files)} CSV files)")
+        self.files = []
+
+
+class JsonlReportWriter(ReportWriter):
+    """Every row of every sheet as one JSON object per line, keyed by header, with a "sheet" field naming where it belongs."""
+
+    extension = '.jsonl'
+
+    def __init__(self, output_file, results_headers=RESULTS_HEADERS):
+        super().__init__(output_file, results_headers)
+        self.file = None
+
+    def _write(self, sheet, headers, rows) -> int:
+        count = 0
+        for values in rows:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+                self.file = open(self.output_file, 'w', encoding='utf-8')
+                self.paths.append(self.output_file)
+            record = {'sheet': sheet}
+            record.update(zip(headers, values))
+            self.file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            count += 1
+        return count
+
+    def add_results(self, rows: Iterable[list[Any]]) -> None:
+        self.results_rows += self._write(RESULTS_SHEET, self.results_headers, rows)
+
+    def add_table(self, title, headers, rows: Iterable[list[Any]], styled=True) -> None:
+        self._write(title, headers, rows)
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        logger.info(f"Saved {self.output_file} ({self.results_rows} result rows)")
+
+
+class HtmlReportWriter(ReportWriter):
+    """One static HTML page: Results first, then each table, coloured like the workbook.
+
+    Result rows are written to the page as they arrive; tables go to a temporary file that is
+    appended on close, so neither is held in memory.
+    """
+
+    extension = '.html'
+    STYLE = (f"body{{font-family:'Open Sans',sans-serif;font-size:10pt}}table{{border-collapse:collapse;margin-bottom:2em}}"
+             f"th,td{{padding:2px 6px;text-align:center;vertical-align:middle}}th,tr:nth-child(even) td{{background:#{PURPLE}}}"
+             f"tr:nth-child(odd) td{{background:#{LIGHT_PURPLE}}}td{{white-space:pre-wrap}}")
+
+    def __init__(self, output_file, results_headers=RESULTS_HEADERS):
+        super().__init__(output_file, results_headers)
+        self.file = None
+        self.tables = None
+        self.titles = []
+
+    @staticmethod
+    def _section(file, title, headers) -> None:
+        file.write(f'<h2 id="{html.escape(sheet_slug(title))}">{html.escape(str(title))}</h2>\n<table>\n')
+        if headers:
+            file.write('<tr>' + ''.join(f'<th>{html.escape(str(value))}</th>' for value in headers) + '</tr>\n')
+
+    @staticmethod
+    def _rows(file, rows) -> int:
+        count = 0
+        for values in rows:
+            file.write('<tr>' + ''.join(f'<td>{"" if value is None else html.escape(str(value))}</td>' for value in values) + '</tr>\n')
+            count += 1
+        return count
+
+    def _page(self) -> Any:
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+            self.file = open(self.output_file, 'w', encoding='utf-8')
+            self.paths.append(self.output_file)
+            self.file.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(os.path.basename(self.output_file))}</title>'
+                            f'<style>{self.STYLE}</style></head><body>\n')
+        return self.file
+
+    def add_results(self, rows: Iterable[list[Any]]) -> None:
+        for values in rows:
+            if self.results_rows == 0:
+                self._section(self._page(), RESULTS_SHEET, self.results_headers)
+                self.titles.insert(0, RESULTS_SHEET)
+            self.results_rows += self._rows(self.file, [values])
+
+    def add_table(self, title, headers, rows: Iterable[list[Any]], styled=True) -> None:
+        if self.tables is None:
+            self.tables = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self._section(self.tables, title, headers)
+        self._rows(self.tables, rows)
+        self.tables.write('</table>\n')
+        self.titles.append(title)
+
+    def close(self) -> None:
+        if self.file is None and self.tables is None:
+            return
+        page = self._page()
+        if self.results_rows:
+            page.write('</table>\n')
+        if self.tables is not None:
+            self.tables.seek(0)
+            shutil.copyfileobj(self.tables, page)
+            self.tables.close()
+            self.tables = None
+        page.write('<nav>' + ' | '.join(f'<a href="#{html.escape(sheet_slug(title))}">{html.escape(str(title))}</a>' for title in self.titles) + '</nav>\n')
+        page.write('</body></html>\n')
+        page.close()
+        self.file = None
+        logger.info(f"Saved {self.output_file} ({self.results_rows} result rows, {len(self.titles)} sections)")
+
+
+class ParquetReportWriter(ReportWriter):
+    """Results in output_file and each table in its own Parquet file next to it, in row groups of PARQUET_BATCH_ROWS.
+
+    Every column is stored as text, as in the CSVs, so rows of any table share one schema.
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, output_file, results_headers=RESULTS_HEADERS):
+        super().__init__(output_file, results_headers)
+        self.results_file = None
+        self.results_batch = []
+        self.saved = 0
+
+    @staticmethod
+    def _schema(headers) -> 'pa.Schema':
+        # Parquet needs distinct column names; a repeated header gets its position appended
+        names = [str(name) if str(name) not in map(str, headers[:i]) else f"{name}_{i}" for i, name in enumerate(headers)]
+        return pa.schema([(name, pa.string()) for name in names])
+
+    @staticmethod
+    def _batch(schema, rows) -> 'pa.Table':
+        width = len(schema)
+        columns = [[] for _ in range(width)]
+        for values in rows:
+            values = list(values)[:width]
+            values += [None] * (width - len(values))
+            for column, value in zip(columns, values):
+                column.append(None if value is None else str(value))
+        return pa.Table.from_arrays([pa.array(column, pa.string()) for column in columns], schema=schema)
+
+    def _flush_results(self) -> None:
+        if not self.results_batch:
+            return
+        if self.results_file is None:
+            os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+            self.results_schema = self._schema(self.results_headers)
+            self.results_file = pq.ParquetWriter(self.output_file, self.results_schema)
+            self.paths.append(self.output_file)
+        self.results_file.write_table(self._batch(self.results_schema, self.results_batch))
+        self.results_batch = []
+
+    def add_results(self, rows: Iterable[list[Any]]) -> None:
+        for values in rows:
+            self.results_batch.append(values)
+            self.results_rows += 1
+            if len(self.results_batch) >= PARQUET_BATCH_ROWS:
+                self._flush_results()
+
+    def add_table(self, title, headers, rows: Iterable[list[Any]], styled=True) -> None:
+        path = self.sheet_path(title)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        schema = self._schema(headers)
+        batch = []
+        with pq.ParquetWriter(path, schema) as writer:
+            for values in rows:
+                batch.append(values)
+                if len(batch) >= PARQUET_BATCH_ROWS:
+                    writer.write_table(self._batch(schema, batch))
+                    batch = []
+            writer.write_table(self._batch(schema, batch))
+        self.paths.append(path)
+        self.saved += 1
+
+    def close(self) -> None:
+        self._flush_results()
+        if self.results_file is not None:
+            self.results_file.close()
+            self.results_file = None
+            self.saved += 1
+        if self.saved:
+            logger.info(f"Saved {self.output_file} ({self.results_rows} result rows, {self.saved} Parquet files)")
+        self.saved = 0
+
+
+REPORT_WRITERS = {
+    'xlsx': ExcelReportWriter,
+    'csv': CsvReportWriter,
+    'jsonl': JsonlReportWriter,
+    'html': HtmlReportWriter,
+    'parquet': ParquetReportWriter,
+}
+DEFAULT_FORMAT = 'xlsx'  # The mailer attaches the .xlsx reports
+
+
+def resolve_format(report_format) -> str:
+    """report_format, or csv when it is parquet and pyarrow is not installed."""
+    if report_format == 'parquet' and pa is None:
+        logger.warning("pyarrow is not installed, writing csv reports instead of parquet (pip install pyarrow).")
+        return 'csv'
+    return report_format
+
+
+def report_path(stem, report_format) -> str:
+    return stem + REPORT_WRITERS[report_format].extension
+
+
+def open_writer(report_format, output_file, results_headers=RESULTS_HEADERS) -> ReportWriter:
+    return REPORT_WRITERS[report_format](output_file, results_headers)
@@ -0,0 +1,89 @@
+# runWorkspace.py
+import os
+import json
+import uuid
+import hashlib
+import datetime
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = 'runs'
+MANIFEST_FILE = 'manifest.jsonl'
+RUN_ID_ENV = 'SCAN_RUN_ID'  # Set by scannerWrapper so every scanner process writes into the same run
+
+
+def new_run_id() -> str:
+    return f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Workspace:
+    """A directory private to one run, plus an append-only manifest of every artifact the run produced.
+
+    Later stages look artifacts up in the manifest instead of walking shared directories,
+    so two runs never see (or overwrite) each other's files.
+    """
+
+    def __init__(self, run_id, create=True):
+        self.run_id = run_id
+        self.root = os.path.join(RUNS_DIR, run_id)
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        if create:
+            os.makedirs(self.root, exist_ok=True)
+        elif not os.path.isdir(self.root):
+            raise FileNotFoundError(f"No workspace for run {run_id} in {RUNS_DIR}")
+
+    @classmethod
+    def current(cls) -> 'Workspace | None':
+        """The workspace named by SCAN_RUN_ID, or None when running in the shared-directory layout."""
+        run_id = os.environ.get(RUN_ID_ENV)
+        return cls(run_id) if run_id else None
+
+    def path(self, *parts) -> str:
+        """Path inside the workspace; parent directories are created."""
+        full_path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return full_path
+
+    def record(self, artifact_type, target, path) -> dict:
+        """Add an artifact to the manifest with its size and content hash."""
+        entry = {
+            'type': artifact_type,
+            'target': target,
+            'path': path,
+            'size': os.path.getsize(path),
+            'sha256': file_sha256(path),
+            'recorded_at': datetime.datetime.now().isoformat(timespec='seconds')
+        }
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            # A single O_APPEND write per entry keeps lines whole when several processes record at once
+            fd = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+        return entry
+
+    def artifacts(self, artifact_type=None) -> list[dict]:
+        """Manifest entries, optionally of one type. A path recorded twice keeps its latest entry."""
+        entries: dict[str, dict] = {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry['path']] = entry
+        except FileNotFoundError:
+            return []
+        return [entry for entry in entries.values() if artifact_type is None or entry['type'] == artifact_type]
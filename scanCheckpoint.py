@@ -0,0 +1,74 @@
+# scanCheckpoint.py
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = 'output/checkpoints'
+
+
+class Checkpoint:
+    """Manifest of the targets a run has completed and the artifacts each one produced.
+
+    A fresh run starts an empty manifest. A resumed run loads the previous one so completed
+    targets are skipped and an interrupted target reuses the artifact paths it had claimed.
+    """
+
+    def __init__(self, tool, group, resume=False, directory=CHECKPOINT_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{tool}_{group.replace(' ', '_')}.json")
+        self._lock = threading.Lock()
+        self.state = None
+        if resume:
+            self.state = self._load()
+            if self.state is None or self.state.get('finished_at'):
+                logger.info(f"No interrupted {tool} run for {group} to resume, starting a new run.")
+                self.state = None
+            else:
+                logger.info(f"Resuming {tool} run for {group}: {len(self.state['completed'])} targets already done.")
+        if self.state is None:
+            self.state = {'tool': tool, 'group': group, 'started_at': time.time(), 'finished_at': None, 'completed': {}, 'in_progress': {}}
+            self._save()
+
+    def _load(self) -> dict | None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def is_done(self, target) -> bool:
+        return target in self.state['completed']
+
+    def remaining(self, targets) -> list:
+        return [target for target in targets if not self.is_done(target)]
+
+    def planned_artifacts(self, target) -> list[str]:
+        """Artifacts an interrupted attempt at target had claimed, so a retry overwrites them instead of adding _1, _2 copies."""
+        return self.state['in_progress'].get(target, [])
+
+    def start(self, target, artifacts) -> None:
+        with self._lock:
+            self.state['in_progress'][target] = list(artifacts)
+            self._save()
+
+    def complete(self, target, artifacts) -> None:
+        with self._lock:
+            self.state['in_progress'].pop(target, None)
+            self.state['completed'][target] = {'artifacts': list(artifacts), 'finished_at': time.time()}
+            self._save()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.state['finished_at'] = time.time()
+            self._save()
@@ -0,0 +1,103 @@
+# scanScheduler.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+import WPScanner
+import twister
+import rateLimiter
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 6  # Global number of scans running at the same time
+PER_HOST_LIMIT = 1  # Scans allowed against the same host at the same time
+SCAN_GROUPS = ["ZenPay", "SmartCentral", "PrePaid"]
+
+
+class ScanJob(NamedTuple):
+    tool: str  # "wpscan" or "dnstwist"
+    group: str
+    target: str
+    config_file: str = ""
+
+
+def host_of(target) -> str:
+    """Return the host part of a target URL, used as the per-host concurrency key."""
+    return target.split('//')[-1].split('/')[0].lower()
+
+
+def build_jobs(groups, tools) -> list[ScanJob]:
+    """Build one job per target for every group and tool, interleaving groups so no group waits for another."""
+    per_group = []
+    for group in groups:
+        jobs = []
+        if "wpscan" in tools:
+            jobs.extend(ScanJob("wpscan", group, domain, config_file) for domain, config_file in WPScanner.domain_configurations.get(group, []))
+        if "dnstwist" in tools:
+            jobs.extend(ScanJob("dnstwist", group, domain) for domain in twister.domain_configurations.get(group, []))
+        per_group.append(jobs)
+    interleaved = []
+    for i in range(max((len(jobs) for jobs in per_group), default=0)):
+        interleaved.extend(jobs[i] for jobs in per_group if i < len(jobs))
+    return interleaved
+
+
+def run_job(job, limiter=None) -> bool:
+    """Run a single scan job. WPScan jobs wait for the limiter and feed it their output so it can back off."""
+    if job.tool == "wpscan":
+        if limiter is None:
+            return WPScanner.run_wpwatcher_for_domain(job.target, job.config_file, job.group)
+        limiter.acquire(job.target)
+        ok = WPScanner.run_wpwatcher_for_domain(job.target, job.config_file, job.group, on_line=lambda _label, _stream, line: limiter.observe(job.target, line))
+        limiter.release(job.target, ok)
+        return ok
+    if job.tool == "dnstwist":
+        output_folder, _, workspace = twister.group_output(job.group)
+        ok = twister.run_dnstwist_for_domain(job.target, output_folder, workspace=workspace)
+        twister.record_artifacts(workspace, job.target, '', output_folder + "screenshots")
+        return ok
+    logger.error(f"Unknown scan tool {job.tool} for {job.target}")
+    return False
+
+
+def run_scheduled(jobs, max_workers=MAX_WORKERS, per_host=PER_HOST_LIMIT, limiter=None) -> dict[ScanJob, bool]:
+    """Run jobs concurrently, never exceeding max_workers in total or per_host against a single host."""
+    limiter = limiter or rateLimiter.HostRateLimiter()
+    results: dict[ScanJob, bool] = {}
+    pending = list(jobs)
+    running_per_host: dict[str, int] = {}
+    running = 0
+    condition = threading.Condition()
+    if any(job.tool == "wpscan" for job in pending):
+        WPScanner.ensure_wpscan_updated()
+
+    def finished(job, future) -> None:
+        nonlocal running
+        try:
+            results[job] = future.result()
+        except Exception as e:
+            logger.error(f"{job.group}: {job.tool} failed for {job.target}: {e}")
+            results[job] = False
+        with condition:
+            running -= 1
+            running_per_host[host_of(job.target)] -= 1
+            condition.notify_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with condition:
+            while pending:
+                job = next((j for j in pending if running_per_host.get(host_of(j.target), 0) < per_host), None)
+                if job is None or running >= max_workers:
+                    condition.wait()
+                    continue
+                pending.remove(job)
+                running += 1
+                running_per_host[host_of(job.target)] = running_per_host.get(host_of(job.target), 0) + 1
+                logger.info(f"{job.group}: Starting {job.tool} for {job.target} ({running} running, {len(pending)} queued)")
+                future = executor.submit(run_job, job, limiter)
+                future.add_done_callback(lambda f, job=job: finished(job, f))
+    failed = [job for job, ok in results.items() if not ok]
+    logger.info(f"Scheduler finished {len(results)} jobs, {len(failed)} failed.")
+    for job in failed:
+        logger.error(f"{job.group}: {job.tool} failed for {job.target}")
+    return results
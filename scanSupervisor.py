@@ -0,0 +1,73 @@
+# scanSupervisor.py
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+STREAM_LIMIT = 1024 * 1024  # Longest single line read from a child before asyncio gives up on it
+LineCallback = Callable[[str, str, str], None]  # (label, stream name, line)
+DoneCallback = Callable[[str, int, float], None]  # (label, exit code, wall time)
+
+
+async def _pump(stream, label, stream_name, on_line, transcript) -> None:
+    """Forward a child's stdout/stderr to the log line by line as it is produced."""
+    level = logging.INFO if stream_name == "stdout" else logging.WARNING
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            break
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        logger.log(level, f"{label}: {line}", extra={"markup": False})
+        if transcript is not None:
+            transcript.write(line + '\n')
+        if on_line is not None:
+            on_line(label, stream_name, line)
+
+
+async def stream_process(cmd, label, on_line: Optional[LineCallback] = None, transcript_path=None) -> tuple[int, float]:
+    """Run a command, streaming its output into the log, and return its exit code and wall time."""
+    started = time.monotonic()
+    transcript = None
+    if transcript_path:
+        os.makedirs(os.path.dirname(transcript_path) or '.', exist_ok=True)
+        transcript = open(transcript_path, 'w', encoding='utf-8')
+    try:
+        process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, limit=STREAM_LIMIT)
+        await asyncio.gather(_pump(process.stdout, label, "stdout", on_line, transcript), _pump(process.stderr, label, "stderr", on_line, transcript))
+        returncode = await process.wait()
+    finally:
+        if transcript is not None:
+            transcript.close()
+    elapsed = time.monotonic() - started
+    logger.info(f"{label}: exited with code {returncode} after {elapsed:.1f}s")
+    return returncode, elapsed
+
+
+def run_streaming(cmd, label, on_line: Optional[LineCallback] = None, transcript_path=None) -> tuple[int, float]:
+    """Blocking wrapper around stream_process for callers outside an event loop."""
+    return asyncio.run(stream_process(cmd, label, on_line, transcript_path))
+
+
+async def supervise(jobs, concurrency, on_line: Optional[LineCallback] = None, on_done: Optional[DoneCallback] = None) -> dict[str, tuple[int, float]]:
+    """Run (label, cmd, transcript_path) jobs with at most `concurrency` children alive at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(label, cmd, transcript_path) -> tuple[int, float]:
+        async with semaphore:
+            try:
+                returncode, elapsed = await stream_process(cmd, label, on_line, transcript_path)
+            except OSError as e:
+                logger.error(f"{label}: failed to start {cmd[0]}: {e}")
+                returncode, elapsed = -1, 0.0
+        if on_done is not None:
+            on_done(label, returncode, elapsed)
+        return returncode, elapsed
+
+    outcomes = await asyncio.gather(*(run_one(label, cmd, transcript_path) for label, cmd, transcript_path in jobs))
+    timings = {label: outcome for (label, _, _), outcome in zip(jobs, outcomes)}
+    for label, (returncode, elapsed) in sorted(timings.items(), key=lambda item: item[1][1], reverse=True):
+        logger.info(f"{label}: {elapsed:.1f}s (exit code {returncode})")
+    return timings
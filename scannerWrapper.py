@@ -1,9 +1,12 @@
 # scannerWrapper.py
 import os
+import sys
 import subprocess
 import logging
 from typing import List, Tuple
 from rich.logging import RichHandler
+import scanScheduler
+import runWorkspace
 
 # Configure rich logging
 logging.basicConfig(level=logging.INFO,
@@ -24,6 +27,8 @@ logging.basicConfig(level=logging.INFO,
                                     log_time_format='[%X]')
                     ])
 DomainConfigPair = Tuple[str, str]
+resume_args = ["--resume"] if "--resume" in sys.argv[1:] else []  # Pass --resume through to skip targets an interrupted run finished
+twister_args = [arg for arg in ("--parallel", "--dns-cache", "--plan") if arg in sys.argv[1:]]  # dnstwist options passed through to twister.py
 
 logger = logging.getLogger()  # pylint: disable=invalid-name
 # Create necessary directories
@@ -46,40 +51,63 @@ def create_directories(dirs: List[str]) -> None:
             logger.error(f"Failed to create output directory {directory}: {e}")
 
 
+def start_workspace() -> str | None:
+    """With --workspace, give this run its own directory; child scanners pick it up from SCAN_RUN_ID.
+
+    Transcripts, wpwatcher's reports, log and wpscan output, dnstwist CSVs and checkpoints all go into
+    the run. The wpscan vulnerability database and the fingerprint cache stay shared between runs.
+    """
+    if "--workspace" not in sys.argv[1:]:
+        return None
+    run_id = os.environ.get(runWorkspace.RUN_ID_ENV) or runWorkspace.new_run_id()
+    os.environ[runWorkspace.RUN_ID_ENV] = run_id
+    runWorkspace.Workspace(run_id)
+    logger.info(f"Writing this run into {os.path.join(runWorkspace.RUNS_DIR, run_id)}")
+    return run_id
+
+
 def main() -> None:
     try:
         create_directories(directories)
+        run_id = start_workspace()
         chosen_domain = {
             "1": "ZenPay",
             "2": "SmartCentral",
             "3": "PrePaid",
             "4": "Scan All Sites",
+            "5": "Scan All Sites (Concurrent)",
             "9": "TEST ONLY"  # Add "TEST ONLY" option
-        }.get(input("Enter the domain list to scan (1. ZenPay, 2. SmartCentral, 3. PrePaid, 4. Scan All Sites, 9. TEST ONLY): "), "")
+        }.get(input("Enter the domain list to scan (1. ZenPay, 2. SmartCentral, 3. PrePaid, 4. Scan All Sites, 5. Scan All Sites (Concurrent), 9. TEST ONLY): "), "")
 
         user_input = input("1. DNSTwist 2. WPScan 3. Both: ")
 
         if chosen_domain == "Scan All Sites":  # If "Scan All Sites" is selected
             if user_input in ["2", "3"]:
                 for domain in ["ZenPay", "SmartCentral", "PrePaid"]:
-                    subprocess.run(["python", "WPScanner.py", domain], check=True)
+                    subprocess.run(["python", "WPScanner.py", domain] + resume_args, check=True)
             if user_input in ["1", "3"]:
                 for domain in ["ZenPay", "SmartCentral", "PrePaid"]:
-                    subprocess.run(["python", "twister.py", domain], check=True)
+                    subprocess.run(["python", "twister.py", domain] + resume_args + twister_args, check=True)
+        elif chosen_domain == "Scan All Sites (Concurrent)":
+            tools = {"1": ["dnstwist"], "2": ["wpscan"], "3": ["wpscan", "dnstwist"]}.get(user_input, [])
+            jobs = scanScheduler.build_jobs(scanScheduler.SCAN_GROUPS, tools)
+            scanScheduler.run_scheduled(jobs)
         elif chosen_domain == "TEST ONLY":
             if user_input in ["1", "2", "3"]:
                 # for domain in ["im.com", "wp.org"]:
                 for domain in ["TEST ONLY"]:
-                    subprocess.run(["python", "WPScanner.py", domain], check=True)
-                    subprocess.run(["python", "twister.py", domain], check=True)
+                    subprocess.run(["python", "WPScanner.py", domain] + resume_args, check=True)
+                    subprocess.run(["python", "twister.py", domain] + resume_args + twister_args, check=True)
         else:
             if user_input == "1":
-                subprocess.run(["python", "twister.py", chosen_domain], check=True)
+                subprocess.run(["python", "twister.py", chosen_domain] + resume_args + twister_args, check=True)
             elif user_input == "2":
-                subprocess.run(["python", "WPScanner.py", chosen_domain], check=True)
+                subprocess.run(["python", "WPScanner.py", chosen_domain] + resume_args, check=True)
             elif user_input == "3":
-                subprocess.run(["python", "WPScanner.py", chosen_domain], check=True)
-                subprocess.run(["python", "twister.py", chosen_domain], check=True)
+                subprocess.run(["python", "WPScanner.py", chosen_domain] + resume_args, check=True)
+                subprocess.run(["python", "twister.py", chosen_domain] + resume_args + twister_args, check=True)
+        if run_id:
+            logger.info(f"Summarize this run with: python summarizeScans.py --run {run_id}")
     except Exception as e:
         logger.error(f"An error occurred: {e}")
 
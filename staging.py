@@ -0,0 +1,70 @@
+# staging.py
+import os
+import errno
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors os.link raises when a hard link is not possible here: other filesystem, no link support, link count limit
+LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+
+def link_or_copy(source, destination) -> str:
+    """Make destination hold source's bytes, as a hard link when both sit on one filesystem and as a copy otherwise.
+
+    Only link files the producer never rewrites in place (dnstwist opens its CSVs with mode 'x'); a
+    rewrite through either name changes both. An existing destination is replaced atomically, and a
+    destination already linked to source is left alone.
+    """
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        return destination
+    temp_path = f"{destination}.staging"
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+    try:
+        os.link(source, temp_path)
+    except OSError as e:
+        if e.errno not in LINK_FALLBACK_ERRNOS:
+            raise
+        shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+    return destination
+
+
+def copy(source, destination) -> str:
+    """Copy source over destination atomically, for files their producer may rewrite in place."""
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    temp_path = f"{destination}.staging"
+    shutil.copy2(source, temp_path)
+    os.replace(temp_path, destination)
+    return destination
+
+
+def move(source, destination) -> str:
+    """Rename source to destination, replacing it; falls back to copy and delete across filesystems."""
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    try:
+        os.replace(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, destination)
+    return destination
+
+
+def stage_tree(source_dir, destination_dir, extensions, flatten=False, copy_extensions=()) -> list[str]:
+    """Link every file under source_dir ending in one of extensions into destination_dir, keeping the tree unless flatten.
+
+    Files ending in one of copy_extensions are copied instead, since their producer rewrites them in place.
+    Returns the staged paths.
+    """
+    staged = []
+    for root, _, files in os.walk(source_dir):
+        relative = '' if flatten else os.path.relpath(root, source_dir)
+        for file in files:
+            if file.endswith(extensions):
+                stage = copy if copy_extensions and file.endswith(copy_extensions) else link_or_copy
+                staged.append(stage(os.path.join(root, file), os.path.normpath(os.path.join(destination_dir, relative, file))))
+    return staged
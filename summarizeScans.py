@@ -2,13 +2,20 @@
 import os
 import datetime
 import logging
-import re
-import shutil
-from typing import Any
-import csv
+from typing import Any, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from rich.logging import RichHandler
-import openpyxl
-from openpyxl.styles import PatternFill, Font, Alignment
+import wpscanJson
+import wpscanLog
+import findings
+import lookalikeStore
+import runWorkspace
+import twisterTable
+import reportWriter
+import findingsStore
+import staging
+import backupStore
+import findingsRollup
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO,
@@ -28,39 +35,6 @@ logging.basicConfig(level=logging.INFO,
                     ])
 
 
-def readTxtFile(input_file) -> str:
-    """Reads a text file and returns its content."""
-    with open(input_file, 'r', encoding='utf-8') as file:
-        return file.read()
-
-
-def apply_formatting(worksheet) -> None:
-    """Apply formatting to a worksheet."""
-    purple_fill = PatternFill(start_color="9370DB", end_color="9370DB", fill_type="solid")
-    light_purple_fill = PatternFill(start_color="E6E6FA", end_color="E6E6FA", fill_type="solid")
-    bold_black_font = Font(name="Open Sans", color="000000", bold=True)
-    bold_red_font = Font(name="Open Sans", color="FF0000", bold=True)
-    open_sans_font = Font(name="Open Sans", size=10)
-    for cell in worksheet[1]:
-        cell.fill = purple_fill
-        cell.font = bold_black_font
-        cell.font = Font(bold=True)  # Make the header row bold
-    for cell in worksheet['C']:
-        cell.font = bold_red_font
-    # Set font color for each row in the vulnerability column to black
-    for cell in worksheet['D']:
-        cell.font = bold_black_font
-    for row in worksheet.iter_rows():
-        for cell in row:
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.font = open_sans_font
-    # Apply different color rotation to each row
-    for i, row in enumerate(worksheet.iter_rows(min_row=2), start=1):
-        row_fill = light_purple_fill if i % 2 == 0 else purple_fill
-        for cell in row:
-            cell.fill = row_fill
-
-
 def getUniqueFilename(base_filename) -> str:
     """Get a unique filename by appending a date and a number if the file already exists."""
     filename, extension = os.path.splitext(base_filename)
@@ -71,90 +45,16 @@ def getUniqueFilename(base_filename) -> str:
     return filename
 
 
-def getWorkbook(filename):
-    """Get a workbook object. If the file exists, load the existing data. Otherwise, create a new workbook."""
-    if os.path.exists(filename):
-        return openpyxl.load_workbook(filename)
-    return openpyxl.Workbook()
-
-
 def sanitize_string(value) -> Any:
     """Remove or replace characters that cannot be used in Excel."""
-    illegal_chars = [
-        '\x00',
-        '\x01',
-        '\x02',
-        '\x03',
-        '\x04',
-        '\x05',
-        '\x06',
-        '\x07',
-        '\x08',
-        '\x0b',
-        '\x0c',
-        '\x0d',
-        '\x0e',
-        '\x0f',
-        '\x10',
-        '\x11',
-        '\x12',  # pylint: disable=line-too-long
-        '\x13',
-        '\x14',
-        '\x15',
-        '\x16',
-        '\x17',
-        '\x18',
-        '\x19',
-        '\x1a',
-        '\x1b',
-        '\x1c',
-        '\x1d',
-        '\x1e',
-        '\x1f',
-        '\x7f',
-        '\x80',
-        '\x81',
-        '\x82',
-        '\x83',
-        '\x84',
-        '\x85',
-        '\x86',
-        '\x87',
-        '\x88',
-        '\x89',
-        '\x8a',
-        '\x8b',
-        '\x8c',
-        '\x8d',
-        '\x8e',
-        '\x8f',
-        '\x90',
-        '\x91',
-        '\x92',
-        '\x93',
-        '\x94',
-        '\x95',
-        '\x96',
-        '\x97',
-        '\x98',
-        '\x99',
-        '\x9a',
-        '\x9b',
-        '\x9c',
-        '\x9d',
-        '\x9e',
-        '\x9f'
-    ]
-    for char in illegal_chars:
-        value = value.replace(char, "")  # Remove the illegal character
-    return value
-
-
-def getAllTxtInDir(indir) -> list[Any]:
-    """Find all .txt files within the specified directory and return their paths as a list."""
+    return reportWriter.sanitize(value)
+
+
+def getAllTxtInDir(indir, extension='.txt') -> list[Any]:
+    """Find all files with the given extension within the specified directory and return their paths as a list."""
     txt_files = []
     for filename in os.listdir(indir):
-        if filename.endswith('.txt'):
+        if filename.endswith(extension):
             txt_files.append(os.path.join(indir, filename))
     return txt_files
 
@@ -172,7 +72,7 @@ def delAll(directory, filename_substr) -> bool:
 
 
 def copyRecurse(source_dir, destination_dir, extension='.txt') -> bool:
-    """Copy all files from a directory recursively."""
+    """Copy all files from a directory recursively (as hard links where the filesystem allows)."""
     try:
         if os.path.isdir(source_dir):
             if not os.path.exists(destination_dir):
@@ -186,12 +86,12 @@ def copyRecurse(source_dir, destination_dir, extension='.txt') -> bool:
                     copyRecurse(src_file, dest_file, extension)  # Call the function recursively
                 else:
                     if file.endswith(extension):
-                        shutil.copyfile(src_file, dest_file)
+                        staging.link_or_copy(src_file, dest_file)
             # files_after_copy = os.listdir(destination_dir)  # List files after copy
             os.listdir(destination_dir)
         else:
             if source_dir.endswith(extension):
-                shutil.copyfile(source_dir, destination_dir)
+                staging.link_or_copy(source_dir, destination_dir)
             return True
     except Exception as e:
         logger.error(f'e in copy {e}')
@@ -200,7 +100,7 @@ def copyRecurse(source_dir, destination_dir, extension='.txt') -> bool:
 
 
 def copyCsvFiles(source_dir, destination_dir) -> bool:
-    """Copy all CSV files from a directory recursively to the destination directory."""
+    """Copy all CSV files from a directory recursively to the destination directory (as hard links where the filesystem allows)."""
     try:
         if os.path.isdir(source_dir):
             files = os.listdir(source_dir)
@@ -211,11 +111,11 @@ def copyCsvFiles(source_dir, destination_dir) -> bool:
                 else:
                     if file.endswith('.csv'):
                         dest_file = os.path.join(destination_dir, file)
-                        shutil.copyfile(src_file, dest_file)
+                        staging.link_or_copy(src_file, dest_file)
                         # logger.info(f'Copying CSV files {src_file} to {dest_file}')
         else:
             if source_dir.endswith('.csv'):
-                shutil.copyfile(source_dir, destination_dir)
+                staging.link_or_copy(source_dir, destination_dir)
             return True
     except Exception as e:
         logger.error(f'Error in copying CSV files: {e}')
@@ -223,15 +123,16 @@ def copyCsvFiles(source_dir, destination_dir) -> bool:
     return False
 
 
-def moveLogsToBackup(sourceDir, destDir) -> None:
+def moveLogsToBackup(sourceDir, destDir, keep_prefix=None) -> None:
+    """Move logs and CSVs into destDir, leaving files named keep_prefix* (csv reports) where they are."""
     try:
         if os.path.isdir(sourceDir):
             files = os.listdir(sourceDir)
             for file in files:
                 src_file = os.path.join(sourceDir, file)
                 dest_file = os.path.join(destDir, file)
-                if file.endswith('.txt') or file.endswith('.csv') or file.endswith('.log') and src_file != dest_file:
-                    shutil.move(src_file, dest_file)
+                if file.endswith(('.txt', '.csv', '.log', '.json')) and src_file != dest_file and not (keep_prefix and file.startswith(keep_prefix)):
+                    staging.move(src_file, dest_file)
     except Exception as e:
         logger.error(e)
 
@@ -258,33 +159,17 @@ def setupDirs(OUTDIR, TEMPDIR, BACKUPDIR, TWISTERDIR, LOGSBACKUPDIR, DNSTWISTDIR
         logger.error(f'Error in setting up directories: {e}')
 
 
-def cleanLogsHelper(file_path, start_line) -> Any:
-    """ Process a single file and delete all lines before a specific update line. """
+def cleanLogsHelper(file_path, start_line, new_file_path=None) -> Any:
+    """ Process a single file and delete all lines before a specific update line. Returns the path of the trimmed copy. """
     end_line = "DEBUG - Parsing WPScan output"
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        start_pattern = re.compile(re.escape(start_line))
-        start_index = None
-        for i, line in enumerate(lines):
-            if start_pattern.search(line):
-                start_index = i
-                break
-        end_pattern = re.compile(re.escape(end_line))
-        end_index = None
-        for i, line in enumerate(lines[start_index or 0:], start_index or 0):
-            if end_pattern.search(line):
-                end_index = i
-                break
-        if start_index is not None and end_index is not None:
-            lines = lines[start_index:end_index]
-        elif start_index is not None:
-            lines = lines[start_index:]
-        new_file_path = file_path.rsplit('.', 1)[0] + '.txt'
-        with open(new_file_path, 'w', encoding='utf-8') as file:
-            file.writelines(lines)
+        start, end = wpscanLog.trim_offsets(file_path, start_line, end_line)
+        new_file_path = new_file_path or file_path.rsplit('.', 1)[0] + '.txt'
+        wpscanLog.copy_range(file_path, new_file_path, start, end)
+        return new_file_path
     except Exception as e:
         logger.error(f"Error processing file {file_path}: {e}")
+        return None
 
 
 def cleanLogs(directory, update_line="[i] Updating the Database ...") -> None:
@@ -299,182 +184,165 @@ def cleanLogs(directory, update_line="[i] Updating the Database ...") -> None:
             cleanLogsHelper(file_path, update_line)
 
 
-section_start_interesting_findings = 'Interesting Finding(s):'
-section_end_interesting_findings = '[i] The main theme could not be detected.'
-section_start_vuln_plugins = r"\[\+\] Enumerating Vulnerable Plugins.*"
-section_end_vuln_plugins = '[i] No plugins Found.' or '[+] Enumerating Vulnerable Themes (via Aggressive Methods)'  # pylint: disable=line-too-long
-section_start_vuln_themes = '[+] Enumerating Vulnerable Themes (via Aggressive Methods)'
-section_end_vuln_themes = r"\[\+\] Enumerating Timthumbs.*"
-section_start_timthumbs = '[+] Enumerating Timthumbs (via Aggressive Methods)'
-section_end_timthumbs = '[i] No Timthumbs Found.' or '[+] Enumerating Config Backups (via Aggressive Methods)'  # pylint: disable=line-too-long
-section_start_config_backups = '[+] Enumerating Config Backups (via Aggressive Methods)'
-section_end_config_backups = '[i] No Config Backups Found.' or '[+] Enumerating DB Exports (via Aggressive Methods)'  # pylint: disable=line-too-long
-section_start_db_exports = '[+] Enumerating DB Exports (via Aggressive Methods)'
-section_end_db_exports = '[i] No DB Exports Found.' or '[+] Enumerating Users (via Aggressive Methods)'  # pylint: disable=line-too-long
-section_start_users = '[+] Enumerating Users (via Aggressive Methods)'
-section_end_users = '[i] User(s) Identified:' or '[+] WPScan DB API OK'  # WPScan DB API OK means no users were identified
+def processFileForResults(txt_filename) -> list[findings.Finding]:
+    """Process a text file to extract plugin details, vulnerabilities, and interesting findings."""
+    results, _ = wpscanLog.parse_log(txt_filename)
+    return results
 
 
-def processFileForResults(txt_filename) -> list[Any]:
-    """Process a text file to extract plugin details, vulnerabilities, and interesting findings."""
-    content = readTxtFile(txt_filename)
+def parseLogTask(log_file, txt_file=None, update_line="[i] Updating the Database ...") -> tuple[str, list[findings.Finding], list[str]]:
+    """Pool task: trim a wpwatcher log into txt_file when given, then parse the text report."""
+    if txt_file is not None:
+        log_file = cleanLogsHelper(log_file, update_line, txt_file)
+        if log_file is None:
+            raise ValueError(f"Could not trim the log into {txt_file}")
+    results, raw_lines = wpscanLog.parse_log(log_file)
+    return log_file, results, raw_lines
+
+
+def loadStoredLog(store, sha256, log_file, txt_file=None, update_line="[i] Updating the Database ...") -> tuple[str, list[findings.Finding], list[str]]:
+    """parseLogTask for a log already in the findings store: trim it as usual, but read its findings back instead of parsing."""
+    if txt_file is not None:
+        log_file = cleanLogsHelper(log_file, update_line, txt_file)
+        if log_file is None:
+            raise ValueError(f"Could not trim the log into {txt_file}")
+    return log_file, findingsStore.load_findings(store, sha256, log_file), wpscanLog.read_raw_lines(log_file)
+
+
+def parseLogsInParallel(tasks, max_workers=None, store=None) -> Iterator[tuple[str, list[findings.Finding], list[str], str | None]]:
+    """Run parseLogTask for each (log_file, txt_file) across a process pool, yielding results and the log's content hash in task order.
+
+    Parsing is CPU-bound, so one process per core; the caller stays the only writer of the workbook.
+    With a findings store, each log is hashed first and one already stored is never submitted:
+    its findings are read back from the store.
+    """
+    hashes = [findingsStore.file_sha256(task[0]) for task in tasks] if store is not None else [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [None if sha256 and findingsStore.is_ingested(store, sha256) else executor.submit(parseLogTask, *task) for task, sha256 in zip(tasks, hashes)]
+        for task, sha256, future in zip(tasks, hashes, futures):
+            try:
+                yield (*(loadStoredLog(store, sha256, *task) if future is None else future.result()), sha256)
+            except Exception as e:
+                logger.error(f"Error processing file {task[0]}: {e}")
+
+
+def formatJsonFindings(interesting_findings) -> str:
+    """Render wpscan JSON interesting findings the way the text log prints them."""
+    lines = []
+    for finding in interesting_findings or []:
+        lines.append(f"[+] {finding.get('to_s', finding.get('url', ''))}")
+        lines.extend(f"| Interesting Entry: {entry}" for entry in finding.get('interesting_entries') or [])
+        if finding.get('found_by'):
+            lines.append(f"| Found By: {finding['found_by']}")
+        if finding.get('confidence') is not None:
+            lines.append(f"| Confidence: {finding['confidence']}%")
+    return '\n'.join(lines)
+
+
+def formatJsonItem(item) -> tuple[str, str]:
+    """Render a wpscan JSON plugin/theme object as (vuln_count, details) matching the text log layout."""
+    vulnerabilities = item.get('vulnerabilities') or []
+    lines = [f"| Location: {item.get('location', '')}"]
+    if item.get('latest_version'):
+        lines.append(f"| Latest Version: {item['latest_version']}{' (outdated)' if item.get('outdated') else ''}")
+    if vulnerabilities:
+        lines.append(f"| [!] {len(vulnerabilities)} {'vulnerability' if len(vulnerabilities) == 1 else 'vulnerabilities'} identified:")
+    for vuln in vulnerabilities:
+        lines.append(f"| [!] Title: {vuln.get('title', '')}")
+        if vuln.get('fixed_in'):
+            lines.append(f"|     Fixed in: {vuln['fixed_in']}")
+        references = vuln.get('references') or {}
+        for ref_type, refs in references.items():
+            for ref in refs:
+                lines.append(f"|     - {ref_type}: {ref}")
+    version = item.get('version') or {}
+    if version.get('number'):
+        lines.append(f"| Version: {version['number']} ({version.get('confidence', '?')}% confidence)")
+    return (str(len(vulnerabilities)) if vulnerabilities else ''), '\n'.join(lines)
+
+
+def processJsonForResults(json_filename) -> list[findings.Finding]:
+    """Stream a wpscan --format json file into the same result rows processFileForResults builds from text logs."""
     results = []
-    lines = content.split('\n')
-    current_item = ''  # This will hold either a plugin or theme name
-    current_details = ''
-    current_vuln_count = ''
-    in_interesting_findings = False
-    in_plugins_section = False
-    in_themes_section = False  # Flag to check if we are in the themes section
     interesting_findings = ''
+    for section, slug, value in wpscanJson.iter_wpscan_json(json_filename):
+        if section == 'interesting_findings':
+            interesting_findings = formatJsonFindings(value)
+        elif section in wpscanJson.ITEM_SECTIONS or (section == 'main_theme' and value):
+            vuln_count, details = formatJsonItem(value)
+            results.append(findings.Finding(site=json_filename,
+                                            item=slug or value.get('slug', ''),
+                                            vuln_count=vuln_count,
+                                            details=details,
+                                            interesting_findings=interesting_findings,
+                                            version=(value.get('version') or {}).get('number') or '',
+                                            vulnerabilities=findings.vulnerabilities_from_json(value.get('vulnerabilities'))))
+            interesting_findings = ''  # Only the first item carries the findings, as in the text path
+    return results
 
-    for _, line in enumerate(lines):
-        line = line.strip()
-        if in_interesting_findings:
-            if line in [section_end_interesting_findings, '[i]']:
-                in_interesting_findings = False
-                continue
-            interesting_findings += line + '\n'
-        elif in_plugins_section or in_themes_section:
-            if line.startswith('| Location:'):
-                # Save previous plugin/theme details, if any
-                if current_item:
-                    results.append({
-                        'filename': txt_filename,
-                        'interesting_findings': interesting_findings.strip(),
-                        'plugin/theme': current_item,  # Use 'item' to generalize plugins and themes
-                        'vuln_count': current_vuln_count,
-                        'details': current_details.strip()
-                    })
-                    interesting_findings = ''  # Reset interesting findings for the next item
-                # Capture the plugin/theme name
-                current_item = line.split('/')[-2]
-                current_details = line + '\n'  # Start accumulating the details
-                # current_details = line  # Start accumulating the details
-                current_vuln_count = ''  # Reset the vulnerability count for the new item
-            elif '| [!]' in line:
-                # Vulnerability detail line
-                current_details += line + '\n'  # Accumulate details
-                # current_details += line  # Accumulate details
-                if 'vulnerabilities identified:' in line or 'vulnerability identified:' in line:
-                    current_vuln_count = line.split(' ')[2]  # Capture vulnerability count
-            elif line in [section_end_vuln_plugins, section_start_vuln_themes]:
-                # Check if we've reached the end of plugins or start of themes
-                in_plugins_section = False
-                in_themes_section = line == section_start_vuln_themes
-                if current_item:
-                    # Save the last item's details
-                    results.append({
-                        'filename': txt_filename,
-                        'interesting_findings': interesting_findings.strip(),
-                        'plugin/theme': current_item,
-                        'vuln_count': current_vuln_count,
-                        'details': current_details.strip()
-                    })
-                    interesting_findings = ''  # Reset for the next section
-                    current_item = ''
-                    current_details = ''
-                    current_vuln_count = ''
-            elif re.match(section_end_vuln_themes, line):
-                # End of themes section
-                in_themes_section = False
-                if current_item:
-                    # Save the last theme's details
-                    results.append({
-                        'filename': txt_filename,
-                        'interesting_findings': interesting_findings.strip(),
-                        'plugin/theme': current_item,
-                        'vuln_count': current_vuln_count,
-                        'details': current_details.strip()
-                    })
-                    interesting_findings = ''  # Reset for the next section
-                    current_item = ''
-                    current_details = ''
-                    current_vuln_count = ''
-            else:
-                current_details += line + '\n'  # Continue accumulating details
-        elif line == section_start_interesting_findings:
-            in_interesting_findings = True
-        elif re.search(section_start_vuln_plugins, line) or re.search('[i] Plugin(s) Identified:', line):
-            in_plugins_section = True
-            in_themes_section = False
-        elif re.search(section_start_vuln_themes, line) or re.search('[i] Theme(s) Identified:', line):
-            in_plugins_section = True
-            in_themes_section = False
-    # Capture the last item after the loop ends, if any
-    if current_item and current_details.strip():
-        results.append({
-            'filename': txt_filename,
-            'interesting_findings': interesting_findings.strip(),
-            'plugin/theme': current_item,
-            'vuln_count': current_vuln_count,
-            'details': current_details.strip()
-        })
 
-    return results
+def storeFindings(store, log_file, results, sha256=None) -> None:
+    """Add a log's findings to the findings history under sha256 (by default the hash of log_file), unless already stored."""
+    try:
+        if findingsStore.ingest(store, log_file, results, scan_date=datetime.date.today().isoformat(), sha256=sha256):
+            logger.info(f"Stored findings of {log_file}")
+    except Exception as e:
+        logger.error(f"Error storing findings of {log_file}: {e}")
 
 
-def saveToExcel(txt_filename, results, workbook, output_file) -> bool:
-    """Save processed results to an Excel file."""
+def saveToExcel(txt_filename, results, writer, raw_sheet=True, raw_lines=None) -> bool:
+    """Add a log's result rows, and its raw lines for spreadsheet reports, to the report writer; the report is finished when the writer closes."""
     try:
-        sheet = workbook.create_sheet(title=os.path.splitext(os.path.basename(txt_filename))[0])
-        with open(txt_filename, 'r', encoding='utf-8') as file:
-            for i, line in enumerate(file, 1):
-                sanitized_line = sanitize_string(line.strip())
-                sheet.cell(row=i, column=1, value=sanitized_line)
-        if 'Results' not in workbook.sheetnames:
-            results_sheet = workbook.create_sheet('Results')
-            headers = ["Filename", "Plugin/Theme", "Vuln Count", "Details", "Interesting Findings"]
-            results_sheet.append(headers)
-        else:
-            results_sheet = workbook['Results']
-        for result in results:
-            row = [
-                result.get('filename', ''),
-                result.get('plugin/theme', ''),
-                result.get('vuln_count', ''),
-                result.get('details', ''),
-                result.get('interesting_findings', '')
-            ]
-            results_sheet.append(row)
-        apply_formatting(results_sheet)
-        workbook.save(output_file)
+        if raw_sheet and writer.spreadsheet:
+            if raw_lines is None:
+                _, raw_lines = wpscanLog.parse_log(txt_filename)
+            writer.add_raw_sheet(os.path.splitext(os.path.basename(txt_filename))[0], raw_lines)
+        writer.add_results(result.as_row() for result in results)
         return True
     except Exception as e:
         logger.error(f"Error in saveToExcel: {e}")
         return False
 
 
-def createTwisterResults(input_dir, output_file) -> bool:
+def allTwisterRows(table) -> Iterator[list[str]]:
+    """Rows of every source CSV in turn; All Results keeps each CSV's header row, as before."""
+    for source in table.sources():
+        if table.headers[source]:
+            yield table.headers[source]
+        yield from table.rows(source)
+
+
+def createTwisterResults(input_dir, output_file, csv_files=None, report_format=reportWriter.DEFAULT_FORMAT, run_date=None) -> list[str]:
+    """Build the DNSTwist report from every CSV under input_dir, or from csv_files when given. Returns the files written.
+
+    New or Changed lists registrations merged into the lookalike store with run_date (ISO, default today).
+
+    The CSVs are ingested into a columnar table under twisterTable.INGEST_DIR and streamed from there,
+    once per sheet, instead of being held in memory. The combined All Results sheet, whose rows
+    follow each CSV's own columns, is only written to spreadsheet reports.
+    """
     try:
-        workbook = openpyxl.Workbook()
-        workbook.remove(workbook.active)  # Remove the default sheet
-        all_data = []
-        results_sheet = workbook.create_sheet(title='All Results')
-        headers = ['Type', 'Domain', 'IP Address', 'NS', 'MX', 'HTTP', 'SMTP', 'ESMTP', 'PHASH']
-        results_sheet.append(headers)
-        for root, _, files in os.walk(input_dir):
-            logger.info(f'Processing files in {root}')
-            for file in files:
-                if file.endswith('.csv'):
-                    with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        data = list(reader)
-                        all_data.extend(data)  # Append data for All Results sheet
-                        sheet = workbook.create_sheet(title=os.path.splitext(file)[0])
-                        logger.info(f'Data read from {file}')
-                        for row in data:
-                            sheet.append(row)
-        for row in all_data:
-            results_sheet.append(row)
-        workbook.save(output_file)
-        return True
+        if csv_files is None:
+            csv_files = [os.path.join(root, file) for root, _, files in os.walk(input_dir) for file in files if file.endswith('.csv')]
+        logger.info(f'Processing {len(csv_files)} CSV files')
+        table = twisterTable.TwisterTable(csv_files, parquet_path=twisterTable.ingest_path(output_file))
+        with reportWriter.open_writer(report_format, output_file, results_headers=None) as writer:
+            writer.add_table('New or Changed', lookalikeStore.REPORT_HEADERS, lookalikeStore.new_or_changed(run_date or datetime.date.today().isoformat()), styled=False)
+            if writer.spreadsheet:
+                headers = ['Type', 'Domain', 'IP Address', 'NS', 'MX', 'HTTP', 'SMTP', 'ESMTP', 'PHASH']
+                writer.add_table('All Results', headers, allTwisterRows(table), styled=False)
+            for source in table.sources():
+                if table.headers[source] or writer.spreadsheet:
+                    writer.add_table(source, table.headers[source], table.rows(source), styled=False)
+                logger.info(f'Data read from {source}')
+        return writer.paths
     except Exception as e:
         logger.error(f"Error in createTwisterResults: {e}")
-        return False
+        return []
 
 
-def main() -> None:
+def main(report_format=reportWriter.DEFAULT_FORMAT, remove_archived=False) -> None:
+    report_format = reportWriter.resolve_format(report_format)
     TODAYIS = datetime.datetime.now().strftime('%d-%m-%y')
     OUTDIR = 'Excel'
     TEMPDIR = 'Excel/temp'
@@ -482,8 +350,8 @@ def main() -> None:
     BACKUPDIR = f'Excel/backup_{TODAYIS}'
     LOGSBACKUPDIR = f'Excel/backup_{TODAYIS}/logs'
     DNSTWISTDIR = 'output/dnstwist'
-    WPScan_EXCEL = 'WPScanResults_' + TODAYIS + '.xlsx'
-    DNSTwist_EXCEL = 'DNSTwistResults_' + TODAYIS + '.xlsx'
+    WPScan_EXCEL = reportWriter.report_path('WPScanResults_' + TODAYIS, report_format)
+    DNSTwist_EXCEL = reportWriter.report_path('DNSTwistResults_' + TODAYIS, report_format)
     OUTFILE = os.path.join(OUTDIR, WPScan_EXCEL)
     TWISTEROUTFILE = os.path.join(TWISTERDIR, DNSTwist_EXCEL)
     INDIR = 'logs'
@@ -494,40 +362,40 @@ def main() -> None:
         if not os.path.exists(INDIR):
             logger.error(f"Input directory {INDIR} does not exist")
             exit()
-        copyRecurse(INDIR, TEMPDIR, extension='.log')
-        try:
-            cleanLogs(TEMPDIR)
-            logger.info("Deleted lines before update")
-        except Exception as e:
-            logger.error(f"Error in delete_lines_before_update: {e}")
-        copyRecurse(TEMPDIR, OUTDIR, extension='.txt')
-        delAll(TEMPDIR, '.txt')
-        delAll(TEMPDIR, '.log')
-        if not os.listdir(TEMPDIR):
-            logger.info("TEMPDIR is empty")
-        workbook = getWorkbook(WPScan_EXCEL)
-        if 'Sheet' in workbook.sheetnames:
-            del workbook['Sheet']
-        if 'Results' not in workbook.sheetnames:
-            results_sheet = workbook.create_sheet('Results')
-            headers = ["Filename", "Plugin/Theme", "Vuln Count", "Details", "Interesting Findings"]
-            results_sheet.append(headers)
-        else:
-            results_sheet = workbook['Results']
-            logger.info("'Results' sheet already exists")
+        # Each log is trimmed straight from INDIR into OUTDIR as .txt (the original is only read, then moved to the backup);
+        # text reports already in OUTDIR are parsed as they are
+        parse_tasks = [(log_file, os.path.join(OUTDIR, os.path.splitext(os.path.basename(log_file))[0] + '.txt')) for log_file in getAllTxtInDir(INDIR, extension='.log')]
+        trimmed = {txt_file for _, txt_file in parse_tasks}
+        parse_tasks += [(txt_file, None) for txt_file in getAllTxtInDir(OUTDIR) if txt_file not in trimmed]
         text_files_processed = False
+        all_findings = []  # Kept for the cross-site summary sheets
+        store = findingsStore.connect()
         try:
-            for txt_file in getAllTxtInDir(OUTDIR):
+            writer = reportWriter.open_writer(report_format, WPScan_EXCEL)
+            for txt_file, get_results, raw_lines, sha256 in parseLogsInParallel(parse_tasks, store=store):
                 try:
-                    get_results = processFileForResults(txt_file)
-                    saveToExcel(txt_filename=txt_file, results=get_results, workbook=workbook, output_file=WPScan_EXCEL)
+                    saveToExcel(txt_filename=txt_file, results=get_results, writer=writer, raw_lines=raw_lines)
+                    storeFindings(store, txt_file, get_results, sha256)
+                    all_findings.extend(get_results)
                     text_files_processed = True
                 except Exception as e:
                     logger.error(f"Error processing file {txt_file}: {e}", stack_info=True, exc_info=True, extra={'file': txt_file})
+            for json_file in getAllTxtInDir(INDIR, extension='.json'):
+                try:
+                    get_results = processJsonForResults(json_file)
+                    saveToExcel(txt_filename=json_file, results=get_results, writer=writer, raw_sheet=False)
+                    storeFindings(store, json_file, get_results)
+                    all_findings.extend(get_results)
+                    text_files_processed = True
+                except Exception as e:
+                    logger.error(f"Error processing file {json_file}: {e}", stack_info=True, exc_info=True, extra={'file': json_file})
+            findingsRollup.write_rollups(writer, all_findings)
+            writer.close()
+            store.close()
             if not text_files_processed:
                 logger.error('No text files found in Excel')
             if text_files_processed:
-                logger.info(f"Updated Excel file {WPScan_EXCEL}")
+                logger.info(f"Updated report {WPScan_EXCEL}")
                 if not os.listdir(TEMPDIR):
                     pass
                 else:
@@ -543,15 +411,70 @@ def main() -> None:
     # ! Twister section
     try:
         moveLogsToBackup(INDIR, LOGSBACKUPDIR)
-        moveLogsToBackup(OUTDIR, BACKUPDIR)
-        copyCsvFiles(DNSTWISTDIR, INDIR)
-        copyRecurse(DNSTWISTDIR, BACKUPDIR, extension='.png')
-        createTwisterResults(input_dir=INDIR, output_file=TWISTEROUTFILE)
-        copyRecurse(DNSTWISTDIR, BACKUPDIR, extension='.csv')
-        delAll(INDIR, '.csv')
+        moveLogsToBackup(OUTDIR, BACKUPDIR, keep_prefix='WPScanResults_')
+        # One date for the merge and the report, so CSVs written before midnight still show up as new
+        run_date = datetime.date.today().isoformat()
+        lookalikeStore.merge_dir(DNSTWISTDIR, run_date=run_date)
+        # CSVs are linked into the backup once and the report reads them where dnstwist wrote them
+        # dnstwist reuses its screenshots folder and truncates PNGs in place, so those are copied, never linked
+        staging.stage_tree(DNSTWISTDIR, BACKUPDIR, ('.png', '.csv'), copy_extensions=('.png', ))
+        csv_files = [os.path.join(root, file) for root, _, files in os.walk(DNSTWISTDIR) for file in files if file.endswith('.csv')]
+        createTwisterResults(input_dir=None, output_file=TWISTEROUTFILE, csv_files=csv_files, report_format=report_format, run_date=run_date)
+        backupStore.archive_day_folders(OUTDIR, TODAYIS, remove=remove_archived)
     except Exception as e:
         logger.error(f"Error in main: {e}")
 
 
+def summarizeRun(run_id, report_format=reportWriter.DEFAULT_FORMAT) -> None:
+    """Build the WPScan and DNSTwist reports of one workspace run from the artifacts in its manifest.
+
+    Everything is read from and written into runs/<run_id>, so shared log directories are left alone.
+    """
+    report_format = reportWriter.resolve_format(report_format)
+    TODAYIS = datetime.datetime.now().strftime('%d-%m-%y')
+    workspace = runWorkspace.Workspace(run_id, create=False)
+    wpscan_excel = reportWriter.report_path(workspace.path('excel', f'WPScanResults_{TODAYIS}'), report_format)
+    twister_excel = reportWriter.report_path(workspace.path('excel', f'DNSTwistResults_{TODAYIS}'), report_format)
+    logs = workspace.artifacts('wpscan-log')
+    if logs:
+        writer = reportWriter.open_writer(report_format, wpscan_excel)
+        store = findingsStore.connect()
+        all_findings = []
+        parse_tasks = [(entry['path'], workspace.path('excel', 'logs', os.path.splitext(os.path.basename(entry['path']))[0] + '.txt')) for entry in logs]
+        for txt_file, get_results, raw_lines, sha256 in parseLogsInParallel(parse_tasks, store=store):
+            try:
+                saveToExcel(txt_filename=txt_file, results=get_results, writer=writer, raw_lines=raw_lines)
+                storeFindings(store, txt_file, get_results, sha256)
+                all_findings.extend(get_results)
+            except Exception as e:
+                logger.error(f"Error processing file {txt_file}: {e}")
+        findingsRollup.write_rollups(writer, all_findings)
+        writer.close()
+        store.close()
+        for path in writer.paths:
+            workspace.record('wpscan-report', run_id, path)
+        if writer.paths:
+            logger.info(f"Updated report {wpscan_excel}")
+    csv_files = [entry['path'] for entry in workspace.artifacts('dnstwist-csv')]
+    if csv_files:
+        run_date = datetime.date.today().isoformat()
+        lookalikeStore.merge_files(csv_files, run_date)
+        for path in createTwisterResults(input_dir=None, output_file=twister_excel, csv_files=csv_files, report_format=report_format, run_date=run_date):
+            workspace.record('dnstwist-report', run_id, path)
+    if not logs and not csv_files:
+        logger.error(f"No scan artifacts recorded for run {run_id}")
+
+
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize WPScan and DNSTwist output into reports, Excel workbooks by default.")
+    parser.add_argument('--run', help="Summarize one workspace run (see scannerWrapper.py --workspace) instead of the shared logs directory")
+    parser.add_argument('--format', choices=list(reportWriter.REPORT_WRITERS), default=reportWriter.DEFAULT_FORMAT,
+                        help="Report format; only xlsx reports have a raw sheet per log and are attached by the mailer")
+    parser.add_argument('--remove-archived', action='store_true',
+                        help="Delete past days' Excel/backup_<date> folders once the backup store verifiably holds them")
+    args = parser.parse_args()
+    if args.run:
+        summarizeRun(args.run, args.format)
+    else:
+        main(args.format, args.remove_archived)
@@ -2,8 +2,15 @@
 import os
 import subprocess
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Any
 from rich.logging import RichHandler
+import scanCheckpoint
+import permutationPlanner
+import runWorkspace
+import dnsCache
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -30,6 +37,9 @@ TEST_ONLY_domains = ["https://ianmenethil.com", "https://wp.org"]
 PrePaid_domains = [
     "https://giftcardregistry.com.au", "https://giftcardstore.com.au", "https://propertypay.com.au", "https://universalgiftcard.com.au"
 ]
+DNSTWIST_MAX_PROCESSES = 4  # dnstwist processes running at once in --parallel mode
+DNSTWIST_THREAD_BUDGET = 40  # Resolver threads shared by all of them
+DNSTWIST_NAMESERVERS = "8.8.8.8,1.1.1.1"
 domain_configurations = {"ZenPay": ZenPay_domains, "SmartCentral": SmartCentral_domains, "TEST ONLY": TEST_ONLY_domains, "PrePaid": PrePaid_domains}  # pylint: disable=line-too-long
 
 
@@ -45,53 +55,166 @@ def checkIfFileExists(outputfile) -> Any | str:
     return outputfile
 
 
-def run_dnstwist_for_domain(currentDomain, output_folder) -> None:
-    allFuzzers = "*original,addition,bitsquatting,cyrillic,dictionary,homoglyph,hyphenation,insertion,omission,plural,repetition,replacement,subdomain,tld-swap,transposition,various,vowel-swap"  # pylint: disable=line-too-long
-    dict_file = '_configs/zen.dict'
-    tld_dict_file = '_configs/tld.dict'
+allFuzzers = "*original,addition,bitsquatting,cyrillic,dictionary,homoglyph,hyphenation,insertion,omission,plural,repetition,replacement,subdomain,tld-swap,transposition,various,vowel-swap"  # pylint: disable=line-too-long
+dict_file = '_configs/zen.dict'
+tld_dict_file = '_configs/tld.dict'
+
+
+def group_output(domain_list_name: str) -> tuple[str, str, runWorkspace.Workspace | None]:
+    """Output folder and checkpoint directory for a group: the run's workspace when SCAN_RUN_ID is set, else the shared output tree."""
+    workspace = runWorkspace.Workspace.current()
+    if workspace:
+        return workspace.path('dnstwist', domain_list_name, ''), workspace.root, workspace
+    return f"output/dnstwist/{domain_list_name}/", scanCheckpoint.CHECKPOINT_DIR, None
+
+
+def record_artifacts(workspace, currentDomain, csv_path, screenshots_folder=None) -> None:
+    """Add a domain's CSV (and the group's screenshots) to the run's manifest."""
+    if workspace is None:
+        return
+    if os.path.isfile(csv_path):
+        workspace.record('dnstwist-csv', currentDomain, csv_path)
+    if screenshots_folder and os.path.isdir(screenshots_folder):
+        for file in sorted(os.listdir(screenshots_folder)):
+            if file.endswith('.png'):
+                workspace.record('dnstwist-screenshot', currentDomain, os.path.join(screenshots_folder, file))
+
+
+def run_dnstwist_for_domain(currentDomain, output_folder, checkpoint=None, threads=10, workspace=None) -> bool:
     domain_name = currentDomain.split('//')[-1].split('.')[0]
-    outputFile = os.path.join(output_folder, f"{domain_name}.csv")
-    outputFile = checkIfFileExists(outputFile)
+    planned = checkpoint.planned_artifacts(currentDomain) if checkpoint else []
+    if planned:
+        outputFile = planned[0]  # Reuse the interrupted attempt's name
+        if os.path.exists(outputFile):
+            os.remove(outputFile)  # dnstwist opens --output with mode 'x', so its partial CSV must go first
+    else:
+        outputFile = checkIfFileExists(os.path.join(output_folder, f"{domain_name}.csv"))
+    if checkpoint:
+        checkpoint.start(currentDomain, [outputFile])
     screenshots_folder = output_folder + "screenshots"
-    if not os.path.exists(screenshots_folder):
-        os.makedirs(screenshots_folder)
+    os.makedirs(screenshots_folder, exist_ok=True)
     runTwister = [
         "dnstwist", "--all", "--banners", "--geoip", "--format", "csv", "--lsh", "tlsh", "--lsh-url", currentDomain, "--mxcheck", "--registered",
-        "--phash", "--phash-url", currentDomain, "--screenshots", screenshots_folder, "--threads", "10", "--fuzzers", allFuzzers, "--nameservers",
-        "8.8.8.8,1.1.1.1", "--dictionary", dict_file, "--tld", tld_dict_file, "--output", outputFile, currentDomain
+        "--phash", "--phash-url", currentDomain, "--screenshots", screenshots_folder, "--threads", str(threads), "--fuzzers", allFuzzers, "--nameservers",
+        DNSTWIST_NAMESERVERS, "--dictionary", dict_file, "--tld", tld_dict_file, "--output", outputFile, currentDomain
     ]
-    logger.info(f"Running DNSTwist for {domain_name} with output file {outputFile}")
+    logger.info(f"Running DNSTwist for {domain_name} with {threads} threads and output file {outputFile}")
     try:
         subprocess.run(runTwister, check=True)
         logger.info(f"DNSTwist executed successfully for {domain_name}.")
+        record_artifacts(workspace, currentDomain, outputFile)
+        if checkpoint:
+            checkpoint.complete(currentDomain, [outputFile])
+        return True
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to execute DNSTwist for {domain_name}: {e}")
     except Exception as e:
         logger.error(f"Unexpected error during execution of DNSTwist for {domain_name}: {e}")
+    return False
 
 
-def run_dnstwist(domain_list_name: str) -> None:
+def run_dnstwist(domain_list_name: str, resume: bool = False) -> None:
     domains = domain_configurations.get(domain_list_name, [])
     if not domains:
         logger.error(f"No domains found for the list name: {domain_list_name}")
         return
-    output_folder = f"output/dnstwist/{domain_list_name}/"
-    for currentDomain in domains:
-        run_dnstwist_for_domain(currentDomain, output_folder)
+    output_folder, checkpoint_dir, workspace = group_output(domain_list_name)
+    checkpoint = scanCheckpoint.Checkpoint("dnstwist", domain_list_name, resume=resume, directory=checkpoint_dir)
+    for currentDomain in checkpoint.remaining(domains):
+        run_dnstwist_for_domain(currentDomain, output_folder, checkpoint, workspace=workspace)
+    record_artifacts(workspace, domain_list_name, '', output_folder + "screenshots")
+    if not checkpoint.remaining(domains):
+        checkpoint.finish()
 
     logger.info(f"DNSTwist executed successfully for all domains in {domain_list_name}.")
 
 
-def main(domain_list_name) -> None:
+def run_dnstwist_parallel(domain_list_name: str, resume: bool = False, max_processes=DNSTWIST_MAX_PROCESSES, thread_budget=DNSTWIST_THREAD_BUDGET) -> None:
+    """Run several dnstwist processes at once, splitting a global thread budget between them.
+
+    Threads freed by a finished process go back to the pool, so later launches (and the last
+    stragglers especially) get a larger share of the budget.
+    """
+    domains = domain_configurations.get(domain_list_name, [])
+    if not domains:
+        logger.error(f"No domains found for the list name: {domain_list_name}")
+        return
+    output_folder, checkpoint_dir, workspace = group_output(domain_list_name)
+    checkpoint = scanCheckpoint.Checkpoint("dnstwist", domain_list_name, resume=resume, directory=checkpoint_dir)
+    pending = deque(checkpoint.remaining(domains))
+    condition = threading.Condition()
+    free_threads = thread_budget
+    running = 0
+
+    def run_one(currentDomain, threads) -> None:
+        nonlocal free_threads, running
+        try:
+            run_dnstwist_for_domain(currentDomain, output_folder, checkpoint, threads, workspace)
+        finally:
+            with condition:
+                free_threads += threads
+                running -= 1
+                condition.notify_all()
+
+    with ThreadPoolExecutor(max_workers=max_processes) as executor:
+        with condition:
+            while pending:
+                if running >= max_processes or free_threads < 1:
+                    condition.wait()
+                    continue
+                share = max(1, free_threads // min(max_processes - running, len(pending)))
+                free_threads -= share
+                running += 1
+                executor.submit(run_one, pending.popleft(), share)
+    record_artifacts(workspace, domain_list_name, '', output_folder + "screenshots")
+    if not checkpoint.remaining(domains):
+        checkpoint.finish()
+    logger.info(f"DNSTwist executed for all domains in {domain_list_name} across up to {max_processes} processes.")
+
+
+def run_dnstwist_planned(domain_list_name: str, threads=DNSTWIST_THREAD_BUDGET) -> None:
+    """Generate permutations for the whole group up front and resolve each shared candidate only once."""
+    domains = domain_configurations.get(domain_list_name, [])
+    if not domains:
+        logger.error(f"No domains found for the list name: {domain_list_name}")
+        return
+    output_folder, _, workspace = group_output(domain_list_name)
+
+    def output_name(currentDomain) -> str:
+        domain_name = currentDomain.split('//')[-1].split('.')[0]
+        return checkIfFileExists(os.path.join(output_folder, f"{domain_name}.csv"))
+
+    outputs = permutationPlanner.run_planned_group(domains, output_folder, allFuzzers.split(','), dict_file, tld_dict_file, DNSTWIST_NAMESERVERS.split(','), threads,
+                                                   output_name)
+    for currentDomain, csv_path in outputs.items():
+        record_artifacts(workspace, currentDomain, csv_path)
+    logger.info(f"Planned DNSTwist lookups finished for {len(outputs)}/{len(domains)} domains in {domain_list_name}.")
+
+
+def main(domain_list_name, resume=False, parallel=False, dns_cache=False, planned=False) -> None:
+    global DNSTWIST_NAMESERVERS
+    dns_server = None
     try:
-        run_dnstwist(domain_list_name)
+        if dns_cache:
+            dns_server = dnsCache.start_background(upstreams=DNSTWIST_NAMESERVERS.split(','))
+            DNSTWIST_NAMESERVERS = dnsCache.LISTEN_ADDRESS
+        if planned:
+            run_dnstwist_planned(domain_list_name)
+        elif parallel:
+            run_dnstwist_parallel(domain_list_name, resume=resume)
+        else:
+            run_dnstwist(domain_list_name, resume=resume)
     except Exception as e:
         logger.error(f"An error occurred during execution: {e}")
+    finally:
+        if dns_server is not None:
+            dnsCache.shutdown_background(dns_server)
 
 
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
-        main(sys.argv[1])
+        main(sys.argv[1], resume="--resume" in sys.argv[2:], parallel="--parallel" in sys.argv[2:], dns_cache="--dns-cache" in sys.argv[2:],
+             planned="--plan" in sys.argv[2:])
     else:
         logger.error("Domain list name not provided")
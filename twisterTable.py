@@ -0,0 +1,121 @@
+# twisterTable.py
+import os
+import csv
+import hashlib
+import logging
+from typing import Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Without pyarrow the CSVs are streamed row by row instead
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1 << 20  # Bytes of CSV parsed per batch, which bounds memory while ingesting
+DICTIONARY_COLUMNS = ('fuzzer', 'dns_mx', 'dns_ns', 'geoip', 'whois_registrar', 'mx_spy')  # Few distinct values, stored dictionary-encoded
+SOURCE_COLUMN = '_source'
+INGEST_DIR = 'cache/twister'  # Internal columnar copies of the CSVs, kept apart from the reports
+
+
+def source_name(csv_path) -> str:
+    return os.path.splitext(os.path.basename(csv_path))[0]
+
+
+def source_names(csv_paths) -> dict[str, str]:
+    """Source name -> CSV path; a name already taken (the same domain in another group or run) gets _1, _2, ... appended."""
+    sources: dict[str, str] = {}
+    for path in csv_paths:
+        name = base = source_name(path)
+        counter = 1
+        while name in sources:
+            name = f"{base}_{counter}"
+            counter += 1
+        sources[name] = path
+    return sources
+
+
+def ingest_path(report_file) -> str:
+    """Where the CSVs behind report_file are ingested; keyed by the report's full path so two runs' reports never share one."""
+    stem = os.path.splitext(os.path.basename(report_file))[0]
+    digest = hashlib.sha1(os.path.abspath(report_file).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(INGEST_DIR, f"{stem}.{digest}.ingest.parquet")
+
+
+def read_header(csv_path) -> list[str]:
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        return next(csv.reader(file), [])
+
+
+class TwisterTable:
+    """DNSTwist results from many CSVs, ingested once and read back in batches.
+
+    With pyarrow the CSVs are parsed block by block into one Parquet file (one row group per
+    batch, dictionary-encoded where values repeat). Without it rows stream straight from the CSVs.
+    Either way no more than a batch of rows is held in memory.
+    """
+
+    def __init__(self, csv_paths, parquet_path=None):
+        self.csv_paths = source_names(csv_paths)
+        self.headers = {source: read_header(path) for source, path in self.csv_paths.items()}
+        self.parquet_path = None
+        self.row_groups: dict[str, list[int]] = {}
+        if pa is not None and parquet_path and self.csv_paths:
+            try:
+                self._ingest(parquet_path)
+            except (pa.ArrowInvalid, OSError) as e:
+                logger.warning(f"Could not ingest DNSTwist CSVs into {parquet_path}, reading them directly: {e}")
+                self.row_groups = {}
+
+    def sources(self) -> list[str]:
+        return list(self.csv_paths)
+
+    def _schema(self) -> 'pa.Schema':
+        columns = []
+        for header in self.headers.values():
+            columns.extend(column for column in header if column and column not in columns)
+        dictionary = pa.dictionary(pa.int32(), pa.string())
+        return pa.schema([(SOURCE_COLUMN, dictionary)] + [(column, dictionary if column in DICTIONARY_COLUMNS else pa.string()) for column in columns])
+
+    def _ingest(self, parquet_path) -> None:
+        schema = self._schema()
+        columns = schema.names[1:]
+        convert_options = pa_csv.ConvertOptions(column_types={field.name: field.type for field in schema if field.name != SOURCE_COLUMN},
+                                                include_columns=columns,
+                                                include_missing_columns=True)
+        os.makedirs(os.path.dirname(parquet_path) or '.', exist_ok=True)
+        row_group = 0
+        with pq.ParquetWriter(parquet_path, schema) as writer:
+            for source, csv_path in self.csv_paths.items():
+                self.row_groups[source] = []
+                if not self.headers[source]:
+                    continue
+                reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(block_size=BLOCK_SIZE), convert_options=convert_options)
+                for batch in reader:
+                    if batch.num_rows == 0:
+                        continue
+                    source_array = pa.DictionaryArray.from_arrays(pa.array([0] * batch.num_rows, pa.int32()), pa.array([source]))
+                    table = pa.Table.from_batches([batch]).add_column(0, SOURCE_COLUMN, source_array).cast(schema)
+                    writer.write_table(table, row_group_size=batch.num_rows)
+                    self.row_groups[source].append(row_group)
+                    row_group += 1
+        self.parquet_path = parquet_path
+        logger.info(f"Ingested {len(self.csv_paths)} DNSTwist CSVs into {parquet_path} ({row_group} row groups)")
+
+    def rows(self, source) -> Iterator[list[str]]:
+        """Rows of one source CSV, without its header, in the CSV's own column order."""
+        header = self.headers[source]
+        if self.parquet_path is None:
+            with open(self.csv_paths[source], 'r', encoding='utf-8', newline='') as file:
+                reader = csv.reader(file)
+                next(reader, None)
+                yield from reader
+            return
+        if not self.row_groups[source]:
+            return
+        parquet_file = pq.ParquetFile(self.parquet_path)
+        for batch in parquet_file.iter_batches(row_groups=self.row_groups[source], columns=[column for column in header if column]):
+            for values in zip(*(column.to_pylist() for column in batch.columns)):
+                yield ['' if value is None else value for value in values]
@@ -0,0 +1,268 @@
+# wpFingerprint.py
+import os
+import re
+import ssl
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from typing import NamedTuple
+from rich.logging import RichHandler
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_STORE = 'cache/fingerprints.json'
+FINDINGS_CACHE_DIR = 'cache/findings'
+WPSCAN_DB_DIR = os.path.expanduser('~/.wpscan/db')
+WPSCAN_DB_METADATA = os.path.join(WPSCAN_DB_DIR, 'metadata.json')
+FULL_SCAN_MAX_AGE_DAYS = 7  # Force a full scan at least this often, even if nothing changed
+REQUEST_TIMEOUT = 15
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+generator_pattern = re.compile(r'<meta[^>]+name=["\']generator["\'][^>]+content=["\']WordPress\s*([\d.]+)', re.IGNORECASE)
+asset_pattern = re.compile(r'/wp-content/(plugins|themes)/([\w.\-]+)/[^"\'\s>]*?\?ver=([\w.\-]+)')
+slug_pattern = re.compile(r'/wp-content/(plugins|themes)/([\w.\-]+)/')
+core_asset_pattern = re.compile(r'/wp-includes/[^"\'\s>]*?\?ver=([\w.\-]+)')
+
+_store_lock = threading.Lock()
+_db_digests: dict[tuple, str] = {}  # DB file listing (name, size, mtime) -> content digest, so unchanged files are hashed once
+# wpscan runs with --disable-tls-checks, so the pre-pass must not be stricter than the scan it gates
+_ssl_context = ssl.create_default_context()
+_ssl_context.check_hostname = False
+_ssl_context.verify_mode = ssl.CERT_NONE
+
+
+class Gate(NamedTuple):
+    skip: bool
+    digest: str | None  # None when the target could not be fingerprinted
+    db_version: str | None
+
+
+def fetch(url) -> bytes | None:
+    """GET a URL and return the body, or None on any HTTP/network error."""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT, context=_ssl_context) as response:
+            return response.read()
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def content_hash(body) -> str | None:
+    return hashlib.sha256(body).hexdigest() if body is not None else None
+
+
+def fingerprint_target(url) -> dict | None:
+    """Fingerprint a WordPress site from its homepage HTML and readme files. Returns None if the homepage is unreachable."""
+    base = url.rstrip('/')
+    homepage = fetch(base + '/')
+    if homepage is None:
+        return None
+    html = homepage.decode('utf-8', errors='replace')
+    generator = generator_pattern.search(html)
+    core_versions = sorted(set(core_asset_pattern.findall(html)))
+    assets: dict[str, list[str]] = {}
+    for kind, slug, version in asset_pattern.findall(html):
+        assets.setdefault(f"{kind}/{slug}", []).append(version)
+    for kind, slug in slug_pattern.findall(html):
+        assets.setdefault(f"{kind}/{slug}", [])
+    readmes = {'readme.html': content_hash(fetch(base + '/readme.html'))}
+    for item in sorted(assets):
+        kind, slug = item.split('/', 1)
+        readme = 'readme.txt' if kind == 'plugins' else 'style.css'
+        readmes[f"{item}/{readme}"] = content_hash(fetch(f"{base}/wp-content/{item}/{readme}"))
+    return {
+        'wp_version': generator.group(1) if generator else None,
+        'core_asset_versions': core_versions,
+        'assets': {item: sorted(set(versions)) for item, versions in sorted(assets.items())},
+        'readmes': readmes
+    }
+
+
+def fingerprint_digest(fingerprint) -> str:
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def vuln_db_version() -> str | None:
+    """Identify the installed WPScan vulnerability DB by content: its metadata hash, else a digest of every DB file.
+
+    A refresh that downloads the same data keeps the same identity. None when there is no DB to identify,
+    which makes check_target run the full scan.
+    """
+    try:
+        with open(WPSCAN_DB_METADATA, 'rb') as file:
+            return content_hash(file.read())
+    except OSError:
+        pass
+    try:
+        names = sorted(name for name in os.listdir(WPSCAN_DB_DIR) if os.path.isfile(os.path.join(WPSCAN_DB_DIR, name)))
+        listing = tuple((name, os.path.getsize(os.path.join(WPSCAN_DB_DIR, name)), os.path.getmtime(os.path.join(WPSCAN_DB_DIR, name))) for name in names)
+    except OSError:
+        return None
+    if not listing:
+        return None
+    if listing not in _db_digests:
+        digest = hashlib.sha256()
+        for name, _, _ in listing:
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(WPSCAN_DB_DIR, name), 'rb') as file:
+                for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        _db_digests[listing] = digest.hexdigest()
+    return _db_digests[listing]
+
+
+def load_store() -> dict:
+    try:
+        with open(FINGERPRINT_STORE, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_store(store) -> None:
+    os.makedirs(os.path.dirname(FINGERPRINT_STORE), exist_ok=True)
+    temp_path = f"{FINGERPRINT_STORE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(store, file, indent=2, sort_keys=True)
+    os.replace(temp_path, FINGERPRINT_STORE)
+
+
+def findings_path(url) -> str:
+    domain_name = url.split('//')[-1].split('/')[0].replace(':', '_')
+    return os.path.join(FINDINGS_CACHE_DIR, f"{domain_name}.log")
+
+
+def check_target(url, db_version) -> Gate:
+    """Decide whether the full scan of url can be skipped because nothing changed since the stored result."""
+    fingerprint = fingerprint_target(url)
+    if fingerprint is None:
+        logger.warning(f"Could not fingerprint {url}, running a full scan.")
+        return Gate(False, None, db_version)
+    digest = fingerprint_digest(fingerprint)
+    previous = load_store().get(url)
+    if not previous or db_version is None:
+        return Gate(False, digest, db_version)
+    unchanged = previous.get('digest') == digest and previous.get('db_version') == db_version
+    recent = time.time() - previous.get('scanned_at', 0) < FULL_SCAN_MAX_AGE_DAYS * 86400
+    cached = os.path.isfile(previous.get('findings', ''))
+    if unchanged and recent and cached:
+        logger.info(f"{url} is unchanged since {time.ctime(previous['scanned_at'])}, reusing cached findings.")
+        return Gate(True, digest, db_version)
+    return Gate(False, digest, db_version)
+
+
+def reuse_findings(url, dest_dir) -> str | None:
+    """Copy the cached findings of url into dest_dir, returning the new path."""
+    source = load_store().get(url, {}).get('findings')
+    if not source or not os.path.isfile(source):
+        return None
+    os.makedirs(dest_dir, exist_ok=True)
+    destination = os.path.join(dest_dir, os.path.basename(source))
+    shutil.copyfile(source, destination)
+    return destination
+
+
+def record_scan(url, gate, transcript_path) -> None:
+    """Store the fingerprint and findings of a completed full scan so the next run can skip it."""
+    if gate.digest is None or not os.path.isfile(transcript_path):
+        return
+    os.makedirs(FINDINGS_CACHE_DIR, exist_ok=True)
+    cached_findings = findings_path(url)
+    shutil.copyfile(transcript_path, cached_findings)
+    with _store_lock:
+        store = load_store()
+        store[url] = {'digest': gate.digest, 'db_version': gate.db_version, 'findings': cached_findings, 'scanned_at': time.time()}
+        save_store(store)
+
+
+def self_test() -> None:
+    """Run fingerprint_target and check_target against a throwaway WordPress-like site on a local HTTP server."""
+    import tempfile
+    import http.server
+    global FINGERPRINT_STORE, FINDINGS_CACHE_DIR
+    saved = FINGERPRINT_STORE, FINDINGS_CACHE_DIR
+    with tempfile.TemporaryDirectory() as root:
+        site = os.path.join(root, 'site')
+        os.makedirs(os.path.join(site, 'wp-content', 'plugins', 'contact-form-7'))
+        homepage = ('<html><head><meta name="generator" content="WordPress 6.4.2">'
+                    '<link rel="stylesheet" href="/wp-content/plugins/contact-form-7/style.css?ver={version}">'
+                    '<script src="/wp-includes/js/jquery.min.js?ver=3.7.1"></script></head></html>')
+
+        def write(relative, text) -> None:
+            with open(os.path.join(site, relative), 'w', encoding='utf-8') as file:
+                file.write(text)
+
+        write('index.html', homepage.format(version='5.8'))
+        write('readme.html', 'WordPress readme')
+        write(os.path.join('wp-content', 'plugins', 'contact-form-7', 'readme.txt'), 'Stable tag: 5.8')
+
+        class QuietHandler(http.server.SimpleHTTPRequestHandler):
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=site, **kwargs)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        FINGERPRINT_STORE, FINDINGS_CACHE_DIR = os.path.join(root, 'fingerprints.json'), os.path.join(root, 'findings')
+        try:
+            fingerprint = fingerprint_target(url)
+            assert fingerprint is not None, "homepage not fetched"
+            assert fingerprint['wp_version'] == '6.4.2', fingerprint
+            assert fingerprint['assets'] == {'plugins/contact-form-7': ['5.8']}, fingerprint
+            assert fingerprint['core_asset_versions'] == ['3.7.1'], fingerprint
+            assert all(fingerprint['readmes'].values()), fingerprint
+            first = check_target(url, 'db-1')
+            assert not first.skip and first.digest, "a target never scanned must be scanned"
+            transcript = os.path.join(root, 'transcript.log')
+            write(transcript, 'scan output')
+            record_scan(url, first, transcript)
+            assert check_target(url, 'db-1').skip, "an unchanged target with the same DB must be skipped"
+            assert not check_target(url, 'db-2').skip, "a new vulnerability DB must force a scan"
+            assert not check_target(url, None).skip, "an unknown DB must force a scan"
+            write('index.html', homepage.format(version='5.9'))
+            assert not check_target(url, 'db-1').skip, "a changed plugin version must force a scan"
+            server.shutdown()
+            assert not check_target(url, 'db-1').skip, "an unreachable target must be scanned"
+        finally:
+            server.server_close()
+            FINGERPRINT_STORE, FINDINGS_CACHE_DIR = saved
+    logger.info("wpFingerprint self-test passed")
+
+
+if __name__ == "__main__":
+    # Configured here rather than at import so WPScanner keeps its own log format
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M%p',
+                        handlers=[
+                            RichHandler(show_time=True,
+                                        omit_repeated_times=False,
+                                        show_level=True,
+                                        show_path=True,
+                                        enable_link_path=True,
+                                        markup=True,
+                                        rich_tracebacks=True,
+                                        tracebacks_width=200,
+                                        tracebacks_show_locals=False,
+                                        tracebacks_theme='monokai',
+                                        tracebacks_extra_lines=0,
+                                        log_time_format='[%X]')
+                        ])
+    parser = argparse.ArgumentParser(description="Change-detection pre-pass that lets unchanged WordPress sites skip the full wpscan run.")
+    parser.add_argument('--self-test', action='store_true', help="Check the gate against a local HTTP server")
+    parser.add_argument('--db-version', action='store_true', help="Print the identity of the installed WPScan DB")
+    args = parser.parse_args()
+    if args.self_test:
+        self_test()
+    if args.db_version:
+        print(vuln_db_version())
@@ -0,0 +1,104 @@
+# wpscanJson.py
+import json
+import logging
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+ITEM_SECTIONS = ('plugins', 'themes')  # Objects decoded one entry at a time instead of as a whole
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+
+
+class _StreamReader:
+    """Incremental JSON reader: decodes one value at a time from a file read in chunks."""
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:  # Drop what has already been decoded
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A value not yet followed by a delimiter may be a truncated number ("12." of "12.5"); read on unless at EOF
+                following = end
+                while following < len(self.buffer) and self.buffer[following] in _whitespace:
+                    following += 1
+                if (following < len(self.buffer) and self.buffer[following] in ',:}]') or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def members(self) -> Iterator[str]:
+        """Walk the members of an object, yielding each key; the caller must consume the value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}, found {separator!r}")
+
+
+def iter_wpscan_json(path) -> Iterator[tuple[str, str | None, Any]]:
+    """Stream a wpscan --format json document as (section, slug, value) tuples.
+
+    Entries of 'plugins' and 'themes' are yielded one object at a time with their slug; every other
+    top-level member is yielded whole with slug None.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        reader = _StreamReader(file)
+        if reader.peek() != '{':
+            raise ValueError(f"{path} is not a wpscan JSON document")
+        for section in reader.members():
+            if section in ITEM_SECTIONS and reader.peek() == '{':
+                for slug in reader.members():
+                    yield section, slug, reader.value()
+            else:
+                yield section, None, reader.value()
@@ -0,0 +1,167 @@
+# wpscanLog.py
+import os
+import re
+import mmap
+from typing import Iterator
+import findings
+
+PARSER_VERSION = 1  # Bump whenever parse_log's output changes, so findings stored by an older parser are re-parsed
+section_start_interesting_findings = 'Interesting Finding(s):'
+section_end_interesting_findings = '[i] The main theme could not be detected.'
+section_end_vuln_plugins = '[i] No plugins Found.'
+section_start_vuln_themes = '[+] Enumerating Vulnerable Themes (via Aggressive Methods)'
+
+# The section patterns summarizeScans has always matched with re.search, folded into one pass per line
+SECTION_START = re.compile('|'.join(f'(?:{pattern})' for pattern in (r"\[\+\] Enumerating Vulnerable Plugins.*", '[i] Plugin(s) Identified:',
+                                                                         section_start_vuln_themes, '[i] Theme(s) Identified:')))
+SECTION_END_THEMES = re.compile(r"\[\+\] Enumerating Timthumbs.*")
+SECTION_END_ITEMS = frozenset((section_end_vuln_plugins, section_start_vuln_themes))
+SECTION_END_FINDINGS = frozenset((section_end_interesting_findings, '[i]'))
+COPY_CHUNK = 1 << 20  # Bytes per read/write when the kernel cannot copy between the files itself
+
+
+def iter_lines(path) -> Iterator[str]:
+    """Lines of a UTF-8 file read through mmap, split on newlines like str.split('\\n') (a trailing newline yields a final '')."""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield ''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            start = 0
+            while True:
+                end = buffer.find(b'\n', start)
+                if end == -1:
+                    yield buffer[start:].decode('utf-8')
+                    return
+                yield buffer[start:end].decode('utf-8')
+                start = end + 1
+
+
+def read_raw_lines(path) -> list[str]:
+    """The raw lines parse_log returns for path, without parsing it."""
+    lines = list(iter_lines(path))
+    if lines[-1] == '':
+        lines.pop()  # The piece after a final newline is not a line of the file
+    return [line.strip() for line in lines]
+
+
+def trim_offsets(path, start_marker, end_marker) -> tuple[int, int]:
+    """Byte range of a log from the line holding start_marker up to (not including) the next line holding end_marker.
+
+    Without a start marker the whole file is kept; without an end marker the range runs to the end.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0, 0
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        found = buffer.find(start_marker.encode('utf-8'))
+        if found == -1:
+            return 0, size
+        start = buffer.rfind(b'\n', 0, found) + 1
+        found = buffer.find(end_marker.encode('utf-8'), start)
+        end = size if found == -1 else buffer.rfind(b'\n', 0, found) + 1
+    return start, max(start, end)
+
+
+def copy_range(source_path, destination_path, start, end) -> None:
+    """Write bytes [start, end) of source_path to destination_path without passing them through Python where the kernel allows."""
+    temp_path = f"{destination_path}.tmp"  # Also makes trimming a file onto itself safe
+    with open(source_path, 'rb') as source, open(temp_path, 'wb') as destination:
+        offset = start
+        for copy in (_copy_file_range, _sendfile, _read_write):
+            try:
+                while offset < end:
+                    copied = copy(source, destination, offset, end - offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                break
+            except (AttributeError, OSError):  # Not available on this platform or filesystem, try the next method
+                destination.seek(offset - start)
+                destination.truncate()
+    os.replace(temp_path, destination_path)
+
+
+def _copy_file_range(source, destination, offset, count) -> int:
+    return os.copy_file_range(source.fileno(), destination.fileno(), count, offset)
+
+
+def _sendfile(source, destination, offset, count) -> int:
+    return os.sendfile(destination.fileno(), source.fileno(), offset, count)
+
+
+def _read_write(source, destination, offset, count) -> int:
+    source.seek(offset)
+    return destination.write(source.read(min(count, COPY_CHUNK)))
+
+
+def parse_log(txt_filename) -> tuple[list[findings.Finding], list[str]]:
+    """Extract plugin/theme details, vulnerabilities and interesting findings from a WPScan text log in one pass.
+
+    Returns the findings and the stripped raw lines for the log's own sheet. Details are
+    collected as line lists and joined once per item instead of concatenated line by line.
+    """
+    results = []
+    raw_lines = []
+    current_item = ''  # Either a plugin or a theme name
+    current_details: list[str] = []
+    current_vuln_count = ''
+    interesting_findings: list[str] = []
+    in_interesting_findings = False
+    in_plugins_section = False
+    in_themes_section = False
+
+    def save_item() -> None:
+        version, vulnerabilities = findings.parse_details(current_details)
+        results.append(findings.Finding(site=txt_filename,
+                                        item=current_item,
+                                        vuln_count=current_vuln_count,
+                                        details='\n'.join(current_details).strip(),
+                                        interesting_findings='\n'.join(interesting_findings).strip(),
+                                        version=version,
+                                        vulnerabilities=vulnerabilities))
+
+    for raw_line in iter_lines(txt_filename):
+        line = raw_line.strip()
+        raw_lines.append(line)
+        if in_interesting_findings:
+            if line in SECTION_END_FINDINGS:
+                in_interesting_findings = False
+                continue
+            interesting_findings.append(line)
+        elif in_plugins_section or in_themes_section:
+            if line.startswith('| Location:'):
+                if current_item:
+                    save_item()
+                    interesting_findings = []  # Only the first item of a log carries the findings
+                current_item = line.split('/')[-2]
+                current_details = [line]
+                current_vuln_count = ''
+            elif '| [!]' in line:
+                current_details.append(line)
+                if 'vulnerabilities identified:' in line or 'vulnerability identified:' in line:
+                    current_vuln_count = line.split(' ')[2]
+            elif line in SECTION_END_ITEMS or SECTION_END_THEMES.match(line):
+                if line in SECTION_END_ITEMS:
+                    in_plugins_section = False
+                    in_themes_section = line == section_start_vuln_themes
+                else:
+                    in_themes_section = False
+                if current_item:
+                    save_item()
+                    interesting_findings = []
+                    current_item = ''
+                    current_details = []
+                    current_vuln_count = ''
+            else:
+                current_details.append(line)
+        elif line == section_start_interesting_findings:
+            in_interesting_findings = True
+        elif SECTION_START.search(line):
+            in_plugins_section = True
+            in_themes_section = False
+    if current_item and '\n'.join(current_details).strip():
+        save_item()
+    if raw_line == '':
+        raw_lines.pop()  # The piece after a final newline is not a line of the file
+    return results, raw_lines